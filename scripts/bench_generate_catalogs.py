@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Benchmark the YAML paths of generate_catalogs.py.
+
+Scales commands_data.yaml and skills_data.yaml up to a large registry (the real
+entries repeated under unique names, with some non-ASCII text mixed in) and
+times each catalog with the pure-Python SafeLoader/SafeDumper and with the
+libyaml CSafeLoader/CSafeDumper, with the parsed-data cache disabled. The
+catalogs produced by both paths are compared byte for byte; any difference
+fails the run. Loading through a warm cache is timed separately.
+
+Usage:
+    python bench_generate_catalogs.py [--entries N] [--repeat N] [--json PATH]
+
+Phases (per catalog, each timed on both paths):
+    load        load_yaml of the scaled data file
+    dump        dump_yaml of the grouped catalog
+    generate    generate_commands_yaml / generate_skills_yaml end to end
+    load_cached load_yaml answered from the warm pickle cache
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+import generate_catalogs as catalogs
+
+SCRIPT_DIR = Path(__file__).parent
+DATA_FILES = {'commands': 'commands_data.yaml', 'skills': 'skills_data.yaml'}
+GENERATORS = {'commands': catalogs.generate_commands_yaml, 'skills': catalogs.generate_skills_yaml}
+
+# Appended to some descriptions so allow_unicode output is exercised
+UNICODE_SUFFIXES = ('', ' — café', ' → naïve', ' (日本語)')
+
+
+LIBYAML_DUMPER = catalogs.CatalogDumper if catalogs.LIBYAML else None
+
+
+def use_libyaml(enabled):
+    """Point generate_catalogs at the libyaml or the pure-Python classes."""
+    if enabled:
+        catalogs.SafeLoader, catalogs.CatalogDumper = yaml.CSafeLoader, LIBYAML_DUMPER
+    else:
+        catalogs.SafeLoader, catalogs.CatalogDumper = yaml.SafeLoader, catalogs.PureCatalogDumper
+    catalogs.LIBYAML = enabled
+
+
+def write_scaled_data(target, entries):
+    """Write DATA_FILES with `entries` records each into target."""
+    for kind, filename in DATA_FILES.items():
+        real = yaml.safe_load((SCRIPT_DIR / filename).read_text(encoding='utf-8'))
+        scaled = []
+        for i in range(entries):
+            record = dict(real[i % len(real)])
+            if i >= len(real):
+                record['name'] = f"{record['name']}-{i}"
+                record['description'] = record['description'] + UNICODE_SUFFIXES[i % len(UNICODE_SUFFIXES)]
+            scaled.append(record)
+        text = yaml.dump(scaled, Dumper=yaml.SafeDumper, allow_unicode=True, default_flow_style=False)
+        (target / filename).write_text(text, encoding='utf-8')
+
+
+def timed(fn, repeat):
+    """Return (best wall time over repeat runs, last result)."""
+    best, value = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, value
+
+
+def bench_catalog(kind, repeat, paths):
+    """Time one catalog on every path.
+
+    Returns:
+        ({phase: {path: seconds}}, seconds for a cached load, mismatches)
+    """
+    filename = DATA_FILES[kind]
+    generator = GENERATORS[kind]
+    timings = {'load': {}, 'dump': {}, 'generate': {}}
+    outputs = {}
+    catalogs.USE_CACHE = False
+    for path in paths:
+        use_libyaml(path == 'libyaml')
+        timings['load'][path], data = timed(lambda: catalogs.load_yaml(filename), repeat)
+        catalog = {'entries': data}
+        timings['dump'][path], _ = timed(lambda: catalogs.dump_yaml(catalog), repeat)
+        timings['generate'][path], outputs[path] = timed(generator, repeat)
+
+    catalogs.USE_CACHE = True
+    catalogs.load_yaml(filename)
+    cached, _ = timed(lambda: catalogs.load_yaml(filename), repeat)
+
+    mismatches = []
+    if len(outputs) > 1 and outputs['python'] != outputs['libyaml']:
+        mismatches.append(kind)
+    return timings, cached, mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the YAML paths of generate_catalogs.py')
+    parser.add_argument('--entries', type=int, default=20_000, help='Records per data file (default: 20000)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per phase (best time is reported)')
+    parser.add_argument('--json', metavar='PATH', help='Also write results as JSON')
+    args = parser.parse_args()
+
+    paths = ['python']
+    if LIBYAML_DUMPER is not None:
+        paths.append('libyaml')
+    else:
+        print('PyYAML was built without libyaml; timing the pure-Python path only', file=sys.stderr)
+
+    original = catalogs.SCRIPT_DIR, catalogs.SafeLoader, catalogs.CatalogDumper, catalogs.LIBYAML, catalogs.USE_CACHE
+    results = {}
+    cached = {}
+    mismatches = []
+    with tempfile.TemporaryDirectory(prefix='bench-catalogs-') as tmp:
+        print(f'Writing {args.entries} records per data file to {tmp}...', file=sys.stderr)
+        write_scaled_data(Path(tmp), args.entries)
+        catalogs.SCRIPT_DIR = Path(tmp)
+        try:
+            for kind in DATA_FILES:
+                timings, cached[kind], bad = bench_catalog(kind, args.repeat, paths)
+                mismatches += bad
+                for phase, by_path in timings.items():
+                    results[f'{phase}_{kind}'] = {path: round(s, 6) for path, s in by_path.items()}
+        finally:
+            catalogs.SCRIPT_DIR, catalogs.SafeLoader, catalogs.CatalogDumper, catalogs.LIBYAML, catalogs.USE_CACHE = original
+
+    print(f"{'phase':<20} {'python s':>10} {'libyaml s':>10} {'speedup':>8} {'records/s':>12}")
+    for phase, r in results.items():
+        fastest = r.get('libyaml', r['python'])
+        speedup = f"{r['python'] / r['libyaml']:.1f}x" if 'libyaml' in r and r['libyaml'] else ''
+        print(
+            f"{phase:<20} {r['python']:>10.4f} {r.get('libyaml', 0):>10.4f} {speedup:>8} "
+            f"{args.entries / fastest if fastest else 0:>12,.0f}"
+        )
+
+    for kind, seconds in cached.items():
+        parsed = min(results[f'load_{kind}'].values())
+        print(f"{'load_cached_' + kind:<20} {seconds:>10.4f} s, {parsed / seconds:.1f}x faster than parsing")
+        results[f'load_cached_{kind}'] = {'cached': round(seconds, 6)}
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({'entries': args.entries, 'results': results}, indent=2), encoding='utf-8')
+        print(f'\nResults written to {args.json}', file=sys.stderr)
+
+    if mismatches:
+        print(f"\nlibyaml output differs from pure-Python output for: {', '.join(mismatches)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""Benchmark suite for generate-opencode.py.
+
+Synthesizes a realistic .claude/ tree at a configurable scale and measures the
+converter building blocks plus full end-to-end runs, reporting wall time,
+files/sec and MB/sec per phase.
+
+Usage:
+    python bench_generate_opencode.py [--scale small|medium|large] [--repeat N]
+                                      [--save-baseline] [--threshold 0.2]
+
+Phases:
+    parse_frontmatter   parse_yaml_frontmatter over every command file (in memory)
+    parse_pyyaml        yaml.safe_load over the same frontmatter blocks, for
+                        comparison (skipped when PyYAML is not installed)
+    serialize           generate_yaml_frontmatter over every converted command
+    serialize_legacy    the pre-optimization serializer over the same input; its
+                        output is also compared byte for byte with serialize
+    copy_tree           copy_tree_with_rewrite of every skill into an empty
+                        .opencode/skills/, as a --force run copies them
+    generate_cold       generate-opencode.py --force into an empty .opencode/
+    generate_warm       generate-opencode.py again with nothing changed
+
+Baselines:
+    --save-baseline stores the results (per scale) in bench_baseline.json next
+    to this script; later runs compare against it and exit with status 1 when a
+    phase is slower than baseline * (1 + threshold).
+"""
+
+import argparse
+import importlib.util
+import json
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import yaml
+except ImportError:  # Only needed for the parse_pyyaml comparison phase
+    yaml = None
+
+SCRIPT_DIR = Path(__file__).parent
+GENERATOR_PATH = SCRIPT_DIR / "generate-opencode.py"
+DEFAULT_BASELINE = SCRIPT_DIR / "bench_baseline.json"
+
+# Corpus sizes: commands, agents, skills, workflows
+SCALES = {
+    "small": {"commands": 100, "agents": 20, "skills": 10, "workflows": 5},
+    "medium": {"commands": 10_000, "agents": 200, "skills": 100, "workflows": 50},
+    "large": {"commands": 100_000, "agents": 1_000, "skills": 500, "workflows": 200},
+}
+
+WORDS = (
+    "plan implement review test debug refactor document deploy analyze scout "
+    "agent command skill workflow context project code quality performance "
+    "security database frontend backend release config cache index"
+).split()
+
+
+def load_generator():
+    """Import generate-opencode.py as a module (its name is not importable)."""
+    spec = importlib.util.spec_from_file_location("generate_opencode", GENERATOR_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def make_corpus(
+    root: Path,
+    commands: int,
+    agents: int,
+    skills: int,
+    workflows: int,
+    ref_kb: int = 64,
+    binary_kb: int = 256,
+    seed: int = 42,
+) -> None:
+    """Write a synthetic project with a .claude/ tree under root.
+
+    Commands are spread over nested category directories (up to three levels,
+    like bootstrap/auto/fast.md); skills carry reference docs of about ref_kb
+    KiB, scripts and a binary asset of binary_kb KiB.
+    """
+    rng = random.Random(seed)
+    claude = root / ".claude"
+    (root / ".git").mkdir(parents=True, exist_ok=True)
+    (root / "README.md").write_text("# Bench Project\n\nSynthetic benchmark corpus.\n", encoding="utf-8")
+    (root / "CLAUDE.md").write_text(
+        "# CLAUDE.md\n\n## Workflows\n\n- Follow .claude/workflows/primary-workflow.md\n",
+        encoding="utf-8",
+    )
+
+    agents_dir = claude / "agents"
+    agents_dir.mkdir(parents=True, exist_ok=True)
+    for i in range(agents):
+        description = "\n".join(f"  {sentence(rng, 12)}." for _ in range(4))
+        body = "\n\n".join(
+            f"## Step {n}\n\n{sentence(rng, 40)}. See .claude/skills/skill-{n}/SKILL.md."
+            for n in range(8)
+        )
+        (agents_dir / f"agent-{i}.md").write_text(
+            f"---\nname: agent-{i}\ndescription: >-\n{description}\n"
+            f"model: sonnet\ntools: [Read, Write, Bash]\n---\n\n{body}\n",
+            encoding="utf-8",
+        )
+
+    commands_dir = claude / "commands"
+    categories = [f"cat{c}" for c in range(max(1, commands // 200))]
+    for i in range(commands):
+        depth = i % 3
+        parts = [rng.choice(categories)] + [f"sub{rng.randrange(4)}" for _ in range(depth)]
+        cmd_dir = commands_dir.joinpath(*parts) if depth or i % 2 else commands_dir
+        cmd_dir.mkdir(parents=True, exist_ok=True)
+        quoted = '"' if i % 5 == 0 else ""
+        body = "\n".join(f"{n}. {sentence(rng, 20)} (.claude/commands/{i}.md)" for n in range(10))
+        (cmd_dir / f"cmd-{i}.md").write_text(
+            f"---\ndescription: {quoted}{sentence(rng, 10)}: {rng.choice(WORDS)}{quoted}\n"
+            f"argument-hint: [{rng.choice(WORDS)}]\nagent: planner\n---\n\n"
+            f"Run with $ARGUMENTS.\n\n{body}\n",
+            encoding="utf-8",
+        )
+
+    skills_dir = claude / "skills"
+    reference = "\n".join(sentence(rng, 15) for _ in range(ref_kb * 1024 // 100)) + "\n"
+    binary = bytes(rng.randrange(256) for _ in range(binary_kb * 1024))
+    for i in range(skills):
+        skill = skills_dir / f"skill-{i}"
+        (skill / "references").mkdir(parents=True, exist_ok=True)
+        (skill / "scripts").mkdir(exist_ok=True)
+        (skill / "assets").mkdir(exist_ok=True)
+        (skill / "SKILL.md").write_text(
+            f"---\nname: skill-{i}\ndescription: {sentence(rng, 15)}\n---\n\n"
+            f"Run .claude/skills/skill-{i}/scripts/main.py\n",
+            encoding="utf-8",
+        )
+        for r in range(3):
+            # Only some references mention .claude/, like real skill packs
+            mention = "\nSee .claude/skills/ for more.\n" if r == 0 else ""
+            (skill / "references" / f"ref-{r}.md").write_text(reference + mention, encoding="utf-8")
+        (skill / "scripts" / "main.py").write_text(
+            "CONFIG = '.claude/skills/config.json'\nprint(CONFIG)\n", encoding="utf-8"
+        )
+        (skill / "assets" / "image.bin").write_bytes(binary)
+
+    workflows_dir = claude / "workflows"
+    workflows_dir.mkdir(parents=True, exist_ok=True)
+    for i in range(workflows):
+        (workflows_dir / f"workflow-{i}.md").write_text(
+            f"# Workflow {i}\n\n{sentence(rng, 60)}\n\nUse .claude/agents/agent-{i}.md\n",
+            encoding="utf-8",
+        )
+
+    (claude / "scripts").mkdir(exist_ok=True)
+    (claude / "scripts" / "helper.py").write_text("ROOT = '.claude/'\n", encoding="utf-8")
+
+
+def legacy_yaml_frontmatter(data: dict) -> str:
+    """generate_yaml_frontmatter as it was before the fast serializer (reference output)."""
+    lines = ["---"]
+
+    def format_value(v, use_block_scalar=False):
+        if isinstance(v, bool):
+            return "true" if v else "false"
+        elif isinstance(v, str):
+            # For multiline strings or strings with special chars, use block scalar
+            if use_block_scalar and ("\n" in v or len(v) > 100):
+                # Use YAML block scalar (literal style |)
+                return None  # Signal to use block scalar
+            # Escape special characters and wrap in quotes if needed
+            if "\n" in v or '"' in v or ":" in v or "'" in v or v.startswith(" "):
+                # Escape internal quotes and use double quotes
+                escaped = v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+                return f'"{escaped}"'
+            elif " " in v:
+                return f'"{v}"'
+            return v
+        elif isinstance(v, list):
+            return "[" + ", ".join(str(format_value(item)) for item in v if format_value(item)) + "]"
+        elif isinstance(v, dict):
+            return None  # Handle separately
+        return str(v)
+
+    for key, value in data.items():
+        if isinstance(value, dict):
+            lines.append(f"{key}:")
+            for sub_key, sub_value in value.items():
+                formatted = format_value(sub_value)
+                if formatted is not None:
+                    lines.append(f"  {sub_key}: {formatted}")
+        elif key == "description" and isinstance(value, str):
+            # For description, truncate to first sentence if too long
+            desc = value.replace("\n", " ").strip()
+            # Remove examples and extra content - keep just the main description
+            if "<example>" in desc:
+                desc = desc.split("<example>")[0].strip()
+            if "Examples:" in desc:
+                desc = desc.split("Examples:")[0].strip()
+            # Truncate if still too long (max 200 chars for clean YAML)
+            if len(desc) > 200:
+                desc = desc[:197] + "..."
+            # Escape and quote
+            desc = desc.replace('"', '\\"')
+            lines.append(f'{key}: "{desc}"')
+        else:
+            formatted = format_value(value)
+            if formatted is not None:
+                lines.append(f"{key}: {formatted}")
+
+    lines.append("---")
+    return "\n".join(lines)
+
+
+# Inputs that exercise every quoting and escaping branch of the serializer
+SERIALIZER_SAMPLES = [
+    {"description": 'He said "hi": ok\nnext line', "agent": "planner"},
+    {"description": "x" * 250, "mode": "subagent"},
+    {"description": "Use it. <example>foo</example> Examples: bar", "name": " leading"},
+    {"description": 'back\\slash "q"', "hint": "it's: \\ \"q\"\nline"},
+    {"tools": {"read": True, "write": False, "note": "a b", "empty": "", "n": 3}},
+    {"list": ["a", "b c", "", 'd"e', {"x": 1}, ["n", "m"], None, 0, True], "none": None},
+    {"empty": "", "num": 1.5, "flag": False, "plain": "word"},
+]
+
+
+def check_serializer(gen, frontmatters: list[dict]) -> int:
+    """Compare generate_yaml_frontmatter with the legacy serializer; return mismatches."""
+    mismatches = 0
+    for data in SERIALIZER_SAMPLES + frontmatters:
+        expected = legacy_yaml_frontmatter(data)
+        actual = gen.generate_yaml_frontmatter(data)
+        if actual != expected:
+            mismatches += 1
+            if mismatches <= 3:
+                print(f"Serializer mismatch for {data!r}:\n{expected}\n!=\n{actual}", file=sys.stderr)
+    return mismatches
+
+
+def tree_stats(path: Path) -> tuple[int, int]:
+    """Return (file count, total bytes) below path."""
+    files = [p for p in path.rglob("*") if p.is_file()]
+    return len(files), sum(p.stat().st_size for p in files)
+
+
+def timed(fn, repeat: int) -> float:
+    """Best wall time of fn over repeat runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def result(seconds: float, files: int, nbytes: int) -> dict:
+    return {
+        "seconds": round(seconds, 6),
+        "files": files,
+        "bytes": nbytes,
+        "files_per_sec": round(files / seconds, 1) if seconds else None,
+        "mb_per_sec": round(nbytes / seconds / 1e6, 2) if seconds else None,
+    }
+
+
+def run_generator(root: Path, *extra: str) -> None:
+    subprocess.run(
+        [sys.executable, str(GENERATOR_PATH), "--backup-keep", "0", *extra],
+        cwd=root, check=True, stdout=subprocess.DEVNULL,
+    )
+
+
+def run_benchmarks(root: Path, repeat: int, jobs: int) -> dict:
+    """Run every phase against the corpus at root."""
+    gen = load_generator()
+    results = {}
+
+    command_files = sorted((root / ".claude" / "commands").rglob("*.md"))
+    contents = [p.read_text(encoding="utf-8") for p in command_files]
+    content_bytes = sum(len(c.encode("utf-8")) for c in contents)
+
+    parsed = []
+    def parse_all():
+        parsed[:] = [gen.parse_yaml_frontmatter(c) for c in contents]
+    results["parse_frontmatter"] = result(timed(parse_all, repeat), len(contents), content_bytes)
+
+    if yaml is not None:
+        # Same work as the scanner: find the fence, load the block, slice the
+        # body. Unquoted ": " inside descriptions is invalid YAML but common in
+        # command files; those blocks still count, they just raise.
+        def pyyaml_all():
+            for c in contents:
+                end = c.find("\n---", 3)
+                try:
+                    yaml.safe_load(c[4:end])
+                except yaml.YAMLError:
+                    pass
+                c[end + 4:].strip()
+        results["parse_pyyaml"] = result(timed(pyyaml_all, repeat), len(contents), content_bytes)
+
+    converted = [
+        gen.convert_claude_command_to_opencode(fm, body, p.stem)[0]
+        for (fm, body), p in zip(parsed, command_files)
+    ]
+    serialized = []
+    def serialize_all():
+        serialized[:] = [gen.generate_yaml_frontmatter(fm) for fm in converted]
+    serialize_all()
+    out_bytes = sum(len(s.encode("utf-8")) for s in serialized)
+    results["serialize"] = result(timed(serialize_all, repeat), len(converted), out_bytes)
+    def serialize_legacy():
+        for fm in converted:
+            legacy_yaml_frontmatter(fm)
+    results["serialize_legacy"] = result(timed(serialize_legacy, repeat), len(converted), out_bytes)
+    agent_fm = [
+        gen.convert_claude_agent_to_opencode(*gen.parse_yaml_frontmatter(p.read_text(encoding="utf-8")), p.stem)[0]
+        for p in sorted((root / ".claude" / "agents").glob("*.md"))
+    ]
+    if check_serializer(gen, converted + agent_fm):
+        raise SystemExit("generate_yaml_frontmatter output differs from the legacy serializer")
+
+    files, nbytes = tree_stats(root / ".claude" / "skills")
+    index = gen.SourceIndex.build(root / ".claude")
+    skills = [entry for entry in index.listdir("skills") if entry.is_dir]
+    best = float("inf")
+    with tempfile.TemporaryDirectory() as tmp:
+        for _ in range(repeat):
+            target = Path(tmp) / "skills"
+            if target.exists():
+                shutil.rmtree(target)
+            start = time.perf_counter()
+            for entry in skills:
+                gen.copy_tree_with_rewrite(index, entry.rel, target / entry.path.name)
+            best = min(best, time.perf_counter() - start)
+    results["copy_tree"] = result(best, files, nbytes)
+
+    files, nbytes = tree_stats(root / ".claude")
+    jobs_args = ("--jobs", str(jobs))
+    def cold():
+        shutil.rmtree(root / ".opencode", ignore_errors=True)
+        (root / "AGENTS.md").unlink(missing_ok=True)
+        run_generator(root, "--force", *jobs_args)
+    results["generate_cold"] = result(timed(cold, repeat), files, nbytes)
+    results["generate_warm"] = result(timed(lambda: run_generator(root, *jobs_args), repeat), files, nbytes)
+    return results
+
+
+def print_report(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Print a results table and return the names of regressed phases."""
+    regressions = []
+    print(f"{'phase':<20} {'seconds':>10} {'files/s':>12} {'MB/s':>10} {'vs baseline':>12}")
+    for phase, r in results.items():
+        delta = ""
+        base = baseline.get(phase)
+        if base and base.get("seconds"):
+            ratio = r["seconds"] / base["seconds"]
+            delta = f"{(ratio - 1) * 100:+.1f}%"
+            if ratio > 1 + threshold:
+                regressions.append(phase)
+                delta += " !"
+        print(
+            f"{phase:<20} {r['seconds']:>10.4f} {r['files_per_sec'] or 0:>12,.1f} "
+            f"{r['mb_per_sec'] or 0:>10.2f} {delta:>12}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generate-opencode.py")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="Corpus size preset")
+    parser.add_argument("--commands", type=int, help="Override the number of commands")
+    parser.add_argument("--ref-kb", type=int, default=64, help="Size of each skill reference doc in KiB")
+    parser.add_argument("--binary-kb", type=int, default=256, help="Size of each skill binary asset in KiB")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per phase (best time is reported)")
+    parser.add_argument("--jobs", type=int, default=1, help="--jobs passed to end-to-end runs")
+    parser.add_argument("--corpus", metavar="DIR", help="Keep the generated corpus in DIR")
+    parser.add_argument("--baseline", metavar="PATH", default=str(DEFAULT_BASELINE), help="Baseline file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown before failing (0.2 = 20%%)")
+    parser.add_argument("--json", metavar="PATH", help="Also write results as JSON")
+    args = parser.parse_args()
+
+    sizes = dict(SCALES[args.scale])
+    if args.commands is not None:
+        sizes["commands"] = args.commands
+    key = args.scale if args.commands is None else f"{args.scale}-{args.commands}"
+
+    tmp = None
+    if args.corpus:
+        root = Path(args.corpus)
+    else:
+        tmp = tempfile.TemporaryDirectory(prefix="bench-opencode-")
+        root = Path(tmp.name)
+    try:
+        if not (root / ".claude").exists():
+            print(f"Generating {key} corpus in {root}...", file=sys.stderr)
+            make_corpus(root, ref_kb=args.ref_kb, binary_kb=args.binary_kb, **sizes)
+        results = run_benchmarks(root, args.repeat, args.jobs)
+    finally:
+        if tmp:
+            tmp.cleanup()
+
+    baseline_path = Path(args.baseline)
+    baselines = {}
+    if baseline_path.exists():
+        baselines = json.loads(baseline_path.read_text(encoding="utf-8"))
+
+    print(f"\nScale: {key} ({sizes})")
+    regressions = print_report(results, baselines.get(key, {}), args.threshold)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({key: results}, indent=2), encoding="utf-8")
+    if args.save_baseline:
+        baselines[key] = results
+        baseline_path.write_text(json.dumps(baselines, indent=2), encoding="utf-8")
+        print(f"\n✓ Saved baseline for '{key}' to {baseline_path}")
+    elif regressions:
+        print(f"\nRegression (> {args.threshold:.0%} slower): {', '.join(regressions)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
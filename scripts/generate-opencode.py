@@ -18,16 +18,86 @@ Options:
     --force     Overwrite existing files
     --dry-run   Show what would be created without writing
     --verbose   Show detailed output
+    --jobs N    Convert agents and commands with N worker processes (0 = all CPUs)
+    --rewrite FROM=TO
+                Extra literal rewrite applied alongside .claude/ -> .opencode/
+    --backup-keep N
+                Hardlinked snapshots of .opencode kept on --force (default: 5)
+    --no-prune  Keep outputs whose source was deleted or renamed
+    --lock {wait,skip}
+                What to do when another run holds .opencode/.lock (default: wait)
+    --lock-timeout SECONDS
+                Give up waiting for the lock after SECONDS (default: 0, no limit)
+    --link-mode {copy,hardlink,symlink}
+                How files that need no rewriting are placed (default: copy)
+    --parse-cache-mb MB
+                Size cap of the frontmatter parse cache (default: 16, 0 disables)
+    --watch     Keep running and regenerate changed outputs as .claude/ changes
+    --stats [PATH]
+                Print per-phase timing and I/O counts; with PATH also write JSON
+    --profile [PREFIX]
+                Write cProfile (.pstats) and collapsed-stack (flamegraph) output;
+                add --profile-memory for tracemalloc peak memory per phase
+
+Incremental runs:
+    Every generated output is recorded in .opencode/.manifest.json together with
+    the size, mtime and SHA-256 of the sources it was built from. Without --force,
+    outputs whose sources are unchanged are left untouched and outputs whose
+    sources changed are regenerated. Existing outputs that are not in the manifest
+    (hand-written files, or trees generated before the manifest existed) are never
+    overwritten without --force, and neither are generated files edited since
+    they were written (such as an AGENTS.md rewritten by /init): those are
+    reported and left to the user from then on. Recorded outputs whose source
+    was deleted or renamed are removed at the end of the run (unless --no-prune
+    is given).
+
+    Progress is journaled to .opencode/.journal as outputs are written. If a run
+    is interrupted, the next one picks up the finished outputs (even with
+    --force) and regenerates whatever was in flight.
+
+    Parsed agent and command frontmatter is cached in .opencode/.cache/ keyed by
+    source path, size and mtime (with a content hash as tie-breaker), so --force
+    runs and rewrite-table changes do not re-parse unchanged sources.
+
+Concurrent runs:
+    Runs that write (everything but --dry-run) hold an advisory lock on
+    .opencode/.lock, so editor hooks, pre-commit and watch scripts firing at the
+    same time cannot interleave writes. At most one run queues behind the
+    current one; further runs exit right away, since the queued run indexes
+    .claude/ only once it gets the lock and so picks up their changes as well.
+    --force runs never hand their work to the queued run.
 """
 
 import os
 import sys
+import errno
 import re
+import json
+import mmap
+import stat
 import shutil
+import hashlib
+import sqlite3
+import time
+import heapq
 import argparse
+import codecs
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import Optional
+from typing import NamedTuple, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no reflink ioctl or flock
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
 
 
 def find_project_root() -> Path:
@@ -39,89 +109,1686 @@ def find_project_root() -> Path:
     return current
 
 
-def replace_claude_paths_in_file(file_path: Path) -> None:
-    """Replace .claude/ paths with .opencode/ in a file."""
+# ═══════════════════════════════════════════════════════════════════════════
+# INSTRUMENTATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Slowest files remembered per phase
+SLOWEST_FILES = 5
+
+
+class PhaseStats:
+    """Wall time and I/O counters for one generator phase."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.seconds = 0.0
+        self.files_read = 0
+        self.files_written = 0
+        self.files_unchanged = 0  # Regenerated but identical, so not rewritten
+        self.files_skipped = 0  # Up to date, not regenerated at all
+        self.cache_hits = 0  # Frontmatter taken from the parse cache
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.slowest: list[tuple[float, str]] = []  # min-heap of (seconds, path)
+
+    def to_dict(self) -> dict:
+        return {
+            "seconds": round(self.seconds, 6),
+            "files_read": self.files_read,
+            "files_written": self.files_written,
+            "files_unchanged": self.files_unchanged,
+            "files_skipped": self.files_skipped,
+            "cache_hits": self.cache_hits,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "slowest": [
+                {"path": path, "seconds": round(sec, 6)}
+                for sec, path in sorted(self.slowest, reverse=True)
+            ],
+        }
+
+
+class GenerationStats:
+    """Collects per-phase timing and I/O for one generation pass.
+
+    Phases are started with begin(name), which also ends the previous phase.
+    The I/O helpers report into whichever phase is current, so callers do not
+    have to pass a stats object around.
+    """
+
+    def __init__(self):
+        # Called with each phase name on begin() (used by --profile-memory)
+        self.phase_hook = None
+        # Copy threads report concurrently
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.phases: dict[str, PhaseStats] = {}
+        self.current: Optional[PhaseStats] = None
+        self.phase_start = 0.0
+        self.started = time.perf_counter()
+        self.total_seconds = 0.0
+
+    def begin(self, name: str) -> None:
+        """End the running phase (if any) and start timing a new one."""
+        self.end()
+        if self.phase_hook is not None:
+            self.phase_hook(name)
+        self.current = self.phases.setdefault(name, PhaseStats(name))
+        self.phase_start = time.perf_counter()
+
+    def end(self) -> None:
+        if self.current is not None:
+            self.current.seconds += time.perf_counter() - self.phase_start
+            self.current = None
+        self.total_seconds = time.perf_counter() - self.started
+
+    def _phase(self) -> PhaseStats:
+        if self.current is None:
+            self.begin("other")
+        return self.current
+
+    def read(self, nbytes: int) -> None:
+        with self.lock:
+            phase = self._phase()
+            phase.files_read += 1
+            phase.bytes_read += nbytes
+
+    def wrote(self, nbytes: int) -> None:
+        with self.lock:
+            phase = self._phase()
+            phase.files_written += 1
+            phase.bytes_written += nbytes
+
+    def unchanged(self) -> None:
+        with self.lock:
+            self._phase().files_unchanged += 1
+
+    def skipped(self) -> None:
+        with self.lock:
+            self._phase().files_skipped += 1
+
+    def cache_hit(self) -> None:
+        with self.lock:
+            self._phase().cache_hits += 1
+
+    def file_time(self, path, seconds: float) -> None:
+        """Remember how long one file took, keeping the slowest per phase."""
+        item = (seconds, str(path))
+        with self.lock:
+            heap = self._phase().slowest
+            if len(heap) < SLOWEST_FILES:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+
+    def to_dict(self) -> dict:
+        return {
+            "total_seconds": round(self.total_seconds, 6),
+            "phases": {name: phase.to_dict() for name, phase in self.phases.items()},
+        }
+
+    def print_summary(self) -> None:
+        """Print a per-phase table plus the slowest files overall."""
+        print(f"\n{'Phase':<12} {'Time':>9} {'Read':>7} {'Written':>8} {'Same':>6} {'Skipped':>8} {'Cached':>7} {'MB in':>8} {'MB out':>8}")
+        for phase in self.phases.values():
+            print(
+                f"{phase.name:<12} {phase.seconds:>8.3f}s {phase.files_read:>7} "
+                f"{phase.files_written:>8} {phase.files_unchanged:>6} {phase.files_skipped:>8} "
+                f"{phase.cache_hits:>7} {phase.bytes_read / 1e6:>8.2f} {phase.bytes_written / 1e6:>8.2f}"
+            )
+        print(f"{'total':<12} {self.total_seconds:>8.3f}s")
+        slowest = sorted(
+            ((sec, path, phase.name) for phase in self.phases.values() for sec, path in phase.slowest),
+            reverse=True,
+        )[:SLOWEST_FILES]
+        if slowest:
+            print("\nSlowest files:")
+            for sec, path, name in slowest:
+                print(f"  {sec * 1000:8.1f} ms  [{name}] {path}")
+
+
+STATS = GenerationStats()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# INCREMENTAL BUILD MANIFEST
+# ═══════════════════════════════════════════════════════════════════════════
+
+MANIFEST_NAME = ".manifest.json"
+# Write-ahead log of the running pass; only left behind by interrupted runs
+JOURNAL_NAME = ".journal"
+# Bump when conversion output changes so stale manifests force regeneration
+MANIFEST_VERSION = 1
+
+
+def hash_file(path: Path) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_text(text: str) -> str:
+    """Return the SHA-256 hex digest of a string (used for built-in templates)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SOURCE INDEX
+# ═══════════════════════════════════════════════════════════════════════════
+
+class SourceEntry(NamedTuple):
+    """One file or directory found while indexing .claude/."""
+
+    path: Path
+    rel: str  # POSIX path relative to the index root ("" for the root itself)
+    is_dir: bool
+    size: int
+    mtime_ns: int
+    inode: int
+
+
+class SourceIndex:
+    """In-memory index of the .claude/ tree built from a single os.scandir walk.
+
+    Every generator phase queries the index instead of globbing or stat-ing the
+    source tree again, so each directory is listed and each file stat-ed once.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.entries: dict[str, SourceEntry] = {}
+        self.children: dict[str, list[str]] = {}
+        # False when the root or some directory below it could not be listed
+        self.complete = True
+
+    @classmethod
+    def build(cls, root: Path) -> "SourceIndex":
+        """Walk root once and index every file and directory below it."""
+        index = cls(root)
+        try:
+            st = root.stat()
+        except OSError:
+            index.complete = False
+            return index
+        index.entries[""] = SourceEntry(root, "", True, 0, st.st_mtime_ns, st.st_ino)
+
+        stack = [""]
+        while stack:
+            parent = stack.pop()
+            names = []
+            try:
+                with os.scandir(index.root / parent if parent else index.root) as it:
+                    for entry in it:
+                        rel = f"{parent}/{entry.name}" if parent else entry.name
+                        try:
+                            is_dir = entry.is_dir()
+                            st = entry.stat()
+                        except OSError:
+                            continue  # Broken symlink or vanished file
+                        index.entries[rel] = SourceEntry(
+                            Path(entry.path), rel, is_dir,
+                            0 if is_dir else st.st_size, st.st_mtime_ns, entry.inode(),
+                        )
+                        names.append(entry.name)
+                        if is_dir:
+                            stack.append(rel)
+            except OSError:
+                index.complete = False
+            names.sort()
+            index.children[parent] = [f"{parent}/{n}" if parent else n for n in names]
+        return index
+
+    def get(self, rel: str) -> Optional[SourceEntry]:
+        """Look up an entry by path relative to the index root."""
+        return self.entries.get(rel)
+
+    def lookup(self, path: Path) -> tuple[bool, Optional[SourceEntry]]:
+        """Find an absolute path in the index.
+
+        Returns:
+            (covered, entry): covered is False when path lies outside the index
+            root; entry is None when a covered path does not exist
+        """
+        try:
+            rel = path.relative_to(self.root).as_posix()
+        except ValueError:
+            return False, None
+        return True, self.entries.get("" if rel == "." else rel)
+
+    def is_dir(self, rel: str) -> bool:
+        entry = self.entries.get(rel)
+        return entry is not None and entry.is_dir
+
+    def is_file(self, rel: str) -> bool:
+        entry = self.entries.get(rel)
+        return entry is not None and not entry.is_dir
+
+    def listdir(self, rel: str) -> list[SourceEntry]:
+        """Direct children of a directory, sorted by name."""
+        return [self.entries[c] for c in self.children.get(rel, [])]
+
+    def files(self, rel: str, suffix: str = "", recursive: bool = False) -> list[SourceEntry]:
+        """Files below a directory, optionally filtered by suffix, in sorted order."""
+        result = []
+        for entry in self.listdir(rel):
+            if entry.is_dir:
+                if recursive:
+                    result.extend(self.files(entry.rel, suffix, recursive))
+            elif entry.rel.endswith(suffix):
+                result.append(entry)
+        return result
+
+
+class Manifest:
+    """Source fingerprints for every generated output.
+
+    Entries are keyed by output path (relative to the project root) and hold the
+    list of sources the output was built from. A source matches when its size
+    and mtime are unchanged; if only the mtime moved, the content hash decides.
+    File outputs the generator owns (not links to a source) are fingerprinted
+    the same way, so later hand edits to them can be detected.
+
+    While a pass runs, every output is logged to .opencode/.journal as "begin"
+    before it is written and "done" (with its manifest entry) afterwards. The
+    journal is deleted once the manifest is saved, so finding one on load means
+    the previous run was interrupted: its "done" entries are merged back in
+    (resumed outputs are skipped even under --force if their sources are
+    unchanged), and outputs that were begun but not finished are regenerated
+    unconditionally.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        project_root: Path,
+        entries: Optional[dict] = None,
+        index: Optional[SourceIndex] = None,
+    ):
+        self.path = path
+        self.project_root = project_root
+        self.entries = entries or {}
+        self.index = index
+        self.dirty = False
+        self.config = ""
+        # Set when the rewrite table changed since the manifest was written
+        self.stale = False
+        # Keys of every output the current run considered (see prune)
+        self.expected: set[str] = set()
+        self.journal_path = path.parent / JOURNAL_NAME
+        self.journal = None
+        # From an interrupted run's journal: outputs finished, and in progress
+        self.resumed: set[str] = set()
+        self.in_flight: set[str] = set()
+
+    @classmethod
+    def load(
+        cls,
+        opencode_dir: Path,
+        project_root: Path,
+        index: Optional[SourceIndex] = None,
+        config: str = "",
+    ) -> "Manifest":
+        """Load the manifest, starting empty if missing, corrupt or outdated.
+
+        Args:
+            config: Fingerprint of generator settings that affect every output
+                (the rewrite table and link mode, see generation_config); if it
+                differs from the stored one, all recorded outputs are treated
+                as out of date
+        """
+        path = opencode_dir / MANIFEST_NAME
+        entries = {}
+        stored_config = config
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if data.get("version") == MANIFEST_VERSION:
+                entries = data.get("outputs", {})
+                stored_config = data.get("config", "")
+        except (OSError, ValueError, AttributeError):
+            pass
+        manifest = cls(path, project_root, entries, index)
+        manifest.config = config
+        manifest.stale = stored_config != config
+        manifest.dirty = manifest.stale
+        manifest._replay_journal()
+        return manifest
+
+    def _replay_journal(self) -> None:
+        """Merge what an interrupted run finished, and note what it left open."""
+        try:
+            lines = self.journal_path.read_text(encoding="utf-8").splitlines()
+        except OSError:
+            return
+        usable = False
+        begun = set()
+        for line in lines:
+            try:
+                record = json.loads(line)
+                op, key = record["op"], record.get("key")
+            except (ValueError, KeyError, TypeError):
+                continue  # Torn last line of a killed process
+            if op == "run":
+                # Entries recorded under other settings cannot be trusted
+                usable = record.get("version") == MANIFEST_VERSION and record.get("config") == self.config
+            elif op == "begin":
+                begun.add(key)
+            elif op == "done":
+                begun.discard(key)
+                if usable:
+                    self.entries[key] = record["entry"]
+                    self.resumed.add(key)
+                    self.in_flight.discard(key)
+        self.in_flight |= begun
+        self.dirty = True
+
+    def _log(self, record: dict) -> None:
+        """Append one journal record, starting this run's journal if needed.
+
+        Records are flushed to the OS immediately, which survives the process
+        being killed; they are not fsynced, as power loss is not the concern.
+        """
+        if self.journal is None:
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            self.journal = open(self.journal_path, "w", encoding="utf-8")
+            header = [{"op": "run", "version": MANIFEST_VERSION, "config": self.config}]
+            # Carry progress forward in case this run is interrupted as well:
+            # finished outputs, and outputs still left half-written before
+            header += [
+                {"op": "done", "key": key, "entry": self.entries[key]}
+                for key in sorted(self.resumed) if key in self.entries
+            ]
+            header += [{"op": "begin", "key": key} for key in sorted(self.in_flight)]
+            self.journal.writelines(json.dumps(r) + "\n" for r in header)
+        self.journal.write(json.dumps(record) + "\n")
+        self.journal.flush()
+
+    def begin(self, output_path: Path) -> None:
+        """Journal that an output is about to be (re)written."""
+        self._log({"op": "begin", "key": self.key(output_path)})
+
+    def key(self, output_path: Path) -> str:
+        """Manifest key for an output path."""
+        return self.rel(output_path)
+
+    def rel(self, path: Path) -> str:
+        """Path relative to the project root, in POSIX form."""
+        try:
+            return path.relative_to(self.project_root).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+    def _stat(self, source: Path) -> Optional[tuple[int, int]]:
+        """Return (size, mtime_ns) for a source, from the index when it covers it."""
+        if self.index is not None:
+            covered, entry = self.index.lookup(source)
+            if covered:
+                return (entry.size, entry.mtime_ns) if entry else None
+        try:
+            st = source.stat()
+        except FileNotFoundError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def fingerprint(self, source: Path) -> dict:
+        """Build the manifest record for one source file."""
+        st = self._stat(source)
+        if st is None:
+            return {"path": self.rel(source), "missing": True}
+        return {
+            "path": self.rel(source),
+            "size": st[0],
+            "mtime_ns": st[1],
+            "hash": hash_file(source),
+        }
+
+    def _source_matches(self, recorded: dict, source: Path) -> bool:
+        if recorded.get("path") != self.rel(source):
+            return False
+        st = self._stat(source)
+        if st is None:
+            return bool(recorded.get("missing"))
+        size, mtime_ns = st
+        if recorded.get("missing") or recorded.get("size") != size:
+            return False
+        if recorded.get("mtime_ns") == mtime_ns:
+            return True
+        # Touched but possibly identical: compare content and refresh the mtime
+        if recorded.get("hash") != hash_file(source):
+            return False
+        recorded["mtime_ns"] = mtime_ns
+        self.dirty = True
+        return True
+
+    def is_current(self, output_path: Path, sources: list[Path], salt: str = "") -> bool:
+        """Check whether an output was generated from exactly these sources."""
+        key = self.key(output_path)
+        entry = self.entries.get(key)
+        if entry is None or entry.get("salt", "") != salt:
+            return False
+        if self.stale and key not in self.resumed:
+            return False
+        recorded = entry.get("sources", [])
+        if len(recorded) != len(sources):
+            return False
+        return all(self._source_matches(r, s) for r, s in zip(recorded, sources))
+
+    def _output_fingerprint(self, output_path: Path, sources: list[Path]) -> Optional[dict]:
+        """Fingerprint a written file output, or None for directories and links.
+
+        Hardlinked outputs share their source's inode, so they change with it
+        and are not fingerprinted either.
+        """
+        try:
+            st = output_path.lstat()
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        for source in sources:
+            try:
+                if os.path.samestat(st, source.stat()):
+                    return None
+            except OSError:
+                pass
+        return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": hash_file(output_path)}
+
+    def modified(self, output_path: Path) -> bool:
+        """Check whether a file output was changed since this tool wrote it."""
+        entry = self.entries.get(self.key(output_path))
+        recorded = entry.get("output") if entry else None
+        if not recorded:
+            return False
+        try:
+            st = output_path.lstat()
+            if not stat.S_ISREG(st.st_mode) or recorded.get("size") != st.st_size:
+                return True
+            if recorded.get("mtime_ns") == st.st_mtime_ns:
+                return False
+            if recorded.get("hash") != hash_file(output_path):
+                return True
+        except OSError:
+            return False  # Gone: regenerating it loses nothing
+        recorded["mtime_ns"] = st.st_mtime_ns
+        self.dirty = True
+        return False
+
+    def record(self, output_path: Path, sources: list[Path], salt: str = "") -> None:
+        """Remember the sources an output was just generated from."""
+        key = self.key(output_path)
+        entry = {"sources": [self.fingerprint(s) for s in sources], "salt": salt}
+        output = self._output_fingerprint(output_path, sources)
+        if output is not None:
+            entry["output"] = output
+        self.entries[key] = entry
+        self.dirty = True
+        self._log({"op": "done", "key": key, "entry": entry})
+
+    def expect(self, output_path: Path) -> None:
+        """Mark an output as still produced by some source in this run."""
+        self.expected.add(self.key(output_path))
+
+    def orphans(self) -> list[str]:
+        """Keys of recorded outputs that this run did not expect, sorted."""
+        return sorted(key for key in self.entries if key not in self.expected)
+
+    def forget(self, key: str) -> None:
+        del self.entries[key]
+        self.dirty = True
+
+    def save(self) -> None:
+        """Write the manifest back to disk if anything changed, then drop the journal."""
+        if self.dirty:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            data = {"version": MANIFEST_VERSION, "config": self.config, "outputs": self.entries}
+            write_if_changed(self.path, json.dumps(data, indent=1, sort_keys=True))
+            self.dirty = False
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        self.journal_path.unlink(missing_ok=True)
+
+
+def prune_outputs(manifest: Manifest, index: SourceIndex, args) -> int:
+    """Remove outputs recorded by earlier runs that no source produces any more.
+
+    The expected set is whatever this run passed to needs_generation, so it
+    follows exactly the same source enumeration (including flattened command
+    names). Only outputs listed in the manifest are candidates; files the
+    generator never wrote are left alone. Nothing is pruned when the source
+    index is incomplete, since a missing directory would look like deletions.
+
+    Returns:
+        Number of outputs removed (or that would be removed with --dry-run)
+    """
+    if not index.complete:
+        print("\nSkipped pruning: .claude/ could not be fully read", file=sys.stderr)
+        return 0
+    orphans = manifest.orphans()
+    if orphans:
+        print("\nPruning stale outputs...")
+    for key in orphans:
+        path = manifest.project_root / key
+        if manifest.modified(path):
+            print(f"  Kept (edited since generated): {key}")
+            if not args.dry_run:
+                manifest.forget(key)
+            continue
+        if args.dry_run:
+            print(f"  [DRY-RUN] Would remove: {key}")
+            continue
+        if path.exists() or path.is_symlink():
+            remove_path(path)
+        manifest.forget(key)
+        print(f"  Removed: {key}")
+    return len(orphans)
+
+
+def needs_generation(
+    output_path: Path, sources: list[Path], manifest: Manifest, args, salt: str = ""
+) -> bool:
+    """Decide whether an output must be (re)generated.
+
+    Outputs are generated when missing, when --force is given, or when they
+    were produced by a previous run and their sources have since changed.
+    Existing outputs unknown to the manifest are preserved, and so are
+    outputs edited since they were written: those are reported and dropped
+    from the manifest, leaving them to the user. When resuming an
+    interrupted run, outputs it left half-done are always regenerated, and
+    --force skips the ones it finished. Every output passed here counts as
+    expected, so it survives prune_outputs.
+    """
+    manifest.expect(output_path)
+    key = manifest.key(output_path)
+    if key in manifest.in_flight:
+        regenerate = True  # Interrupted while being written: redo to verify
+        if not args.dry_run:
+            remove_temp_files(output_path)
+    elif not output_path.exists():
+        regenerate = True
+    elif args.force:
+        # Finished by the interrupted run this one resumes: keep if still current
+        regenerate = key not in manifest.resumed or not manifest.is_current(output_path, sources, salt)
+    else:
+        regenerate = key in manifest.entries and not manifest.is_current(output_path, sources, salt)
+        if regenerate and manifest.modified(output_path):
+            print(f"Warning: kept {key}, edited since it was generated (--force overwrites it)", file=sys.stderr)
+            if not args.dry_run:
+                manifest.forget(key)
+            regenerate = False
+    if not regenerate:
+        STATS.skipped()
+        return False
+    if not args.dry_run:
+        manifest.begin(output_path)
+    return True
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PATH REWRITE ENGINE
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Default Claude → OpenCode path mappings; extend with --rewrite FROM=TO
+DEFAULT_PATH_REWRITES = {
+    ".claude/": ".opencode/",
+}
+# Bytes inspected for NUL when deciding whether a file is binary
+BINARY_SNIFF_BYTES = 8192
+# Files at least this large are searched through mmap instead of read()
+MMAP_MIN_SIZE = 64 * 1024
+# Files at least this large are rewritten and copied in chunks, never loaded whole
+STREAM_MIN_SIZE = 8 * 1024 * 1024
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+class PathRewriter:
+    """Apply a table of literal string replacements in a single scan.
+
+    All patterns are compiled into one alternation (longest first, so
+    "~/.claude" wins over ".claude/" at the same position), which keeps the
+    cost of a rewrite independent of how many mappings are configured.
+    Works on both str and UTF-8 bytes; every pattern must be non-empty.
+    """
+
+    def __init__(self, mapping: dict[str, str]):
+        self.mapping = dict(mapping)
+        self.bytes_mapping = {k.encode("utf-8"): v.encode("utf-8") for k, v in self.mapping.items()}
+        ordered = sorted(self.mapping, key=len, reverse=True)
+        self.pattern = re.compile("|".join(re.escape(k) for k in ordered)) if ordered else None
+        self.bytes_pattern = (
+            re.compile(b"|".join(re.escape(k.encode("utf-8")) for k in ordered)) if ordered else None
+        )
+        # Longest pattern in bytes, for callers that scan data in chunks
+        self.max_token_len = max((len(k) for k in self.bytes_mapping), default=0)
+        # No pattern spans lines, so blocks can be cut after any newline
+        self.line_safe = not any(b"\n" in k for k in self.bytes_mapping)
+
+    def fingerprint(self) -> str:
+        """Stable hash of the mapping table, used to invalidate cached outputs."""
+        return hash_text(json.dumps(sorted(self.mapping.items())))
+
+    def rewrite(self, text: str) -> str:
+        """Apply all mappings to a string."""
+        if self.pattern is None:
+            return text
+        if len(self.mapping) == 1:
+            ((old, new),) = self.mapping.items()
+            return text.replace(old, new)
+        return self.pattern.sub(lambda m: self.mapping[m.group(0)], text)
+
+    def rewrite_bytes(self, data: bytes) -> bytes:
+        """Apply all mappings to UTF-8 bytes."""
+        if self.bytes_pattern is None:
+            return data
+        if len(self.bytes_mapping) == 1:
+            ((old, new),) = self.bytes_mapping.items()
+            return data.replace(old, new)
+        return self.bytes_pattern.sub(lambda m: self.bytes_mapping[m.group(0)], data)
+
+    def rewrite_chunk(self, buf: bytes, final: bool) -> tuple[bytes, bytes]:
+        """Rewrite one block of a stream, holding back a possibly split token.
+
+        Normally the block is cut after its last newline, which no pattern can
+        span, and the head is rewritten at C speed. Without a usable newline,
+        matches starting in the last max_token_len - 1 bytes could continue in
+        the next block, so that tail is held back instead. Either way matching
+        resumes exactly where a whole-file scan would, so the output is
+        identical to rewrite_bytes() over the concatenated data.
+
+        Returns:
+            (rewritten bytes, carry to prepend to the next block)
+        """
+        if final or self.bytes_pattern is None:
+            return self.rewrite_bytes(buf), b""
+        if self.line_safe:
+            newline = buf.rfind(b"\n")
+            # Past the middle, so the carry stays smaller than one block
+            if newline >= len(buf) // 2:
+                return self.rewrite_bytes(buf[:newline + 1]), buf[newline + 1:]
+        safe_end = len(buf) - (self.max_token_len - 1)
+        pieces = []
+        pos = 0
+        for m in self.bytes_pattern.finditer(buf):
+            if m.start() >= safe_end:
+                break
+            pieces.append(buf[pos:m.start()])
+            pieces.append(self.bytes_mapping[m.group(0)])
+            pos = m.end()
+        cut = max(safe_end, pos)
+        pieces.append(buf[pos:cut])
+        return b"".join(pieces), buf[cut:]
+
+    def search_bytes(self, buffer) -> bool:
+        """Check whether a bytes-like buffer (bytes or mmap) contains any pattern."""
+        return self.bytes_pattern is not None and self.bytes_pattern.search(buffer) is not None
+
+
+PATH_REWRITER = PathRewriter(DEFAULT_PATH_REWRITES)
+
+
+def configure_path_rewrites(extra: Optional[dict[str, str]] = None) -> PathRewriter:
+    """Install the default mappings plus any extra ones as the active rewriter.
+
+    Also used as the process pool initializer so workers share the table.
+    """
+    global PATH_REWRITER
+    PATH_REWRITER = PathRewriter({**DEFAULT_PATH_REWRITES, **(extra or {})})
+    return PATH_REWRITER
+
+
+def rewrite_claude_paths(text: str) -> str:
+    """Rewrite Claude paths in text using the active mapping table."""
+    return PATH_REWRITER.rewrite(text)
+
+
+def is_probably_binary(data: bytes) -> bool:
+    """Heuristic binary check: text files do not contain NUL bytes."""
+    return b"\0" in data[:BINARY_SNIFF_BYTES]
+
+
+def rewrite_claude_paths_bytes(data: bytes) -> Optional[bytes]:
+    """Rewrite Claude paths in raw file bytes.
+
+    Patterns are matched on the UTF-8 encoding, which is equivalent to matching
+    the decoded text because UTF-8 is self-synchronizing. Decoding only happens
+    (to validate the file as UTF-8) once a pattern is known to be present.
+
+    Returns:
+        Rewritten bytes, or None if nothing matches or the data is not UTF-8 text
+    """
+    if not PATH_REWRITER.search_bytes(data) or is_probably_binary(data):
+        return None
+    try:
+        data.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+    return PATH_REWRITER.rewrite_bytes(data)
+
+
+def file_needs_rewrite(file_path: Path) -> bool:
+    """Check whether a file contains any rewrite pattern without decoding it.
+
+    Large files are memory-mapped so the search does not copy them into Python.
+    """
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return False
+        if size < MMAP_MIN_SIZE:
+            return PATH_REWRITER.search_bytes(f.read())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:BINARY_SNIFF_BYTES].find(b"\0") != -1:
+                return False
+            return PATH_REWRITER.search_bytes(mm)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# OUTPUT LAYER
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Process umask, so atomically written files get the same mode as open(path, "w")
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def file_has_content(path: Path, data: bytes) -> bool:
+    """Check whether path is a regular file holding exactly data (size first, then hash)."""
+    try:
+        st = path.lstat()
+        if not stat.S_ISREG(st.st_mode) or st.st_size != len(data):
+            return False
+    except OSError:
+        return False
+    return hash_file(path) == hashlib.sha256(data).hexdigest()
+
+
+def write_if_changed(
+    path: Path,
+    data,
+    meta_src: Optional[Path] = None,
+    preserve_times: bool = False,
+) -> bool:
+    """Atomically write an output file unless it already has this content.
+
+    Identical outputs are left alone so their mtime does not change and
+    OpenCode does not reload them. Otherwise the data goes to a temp file in
+    the same directory which is then renamed over the destination, so readers
+    never see a partially written file.
+
+    Args:
+        path: Destination file
+        data: bytes, or str which is encoded as UTF-8 with platform newlines
+            (matching open(path, "w"))
+        meta_src: Copy permission bits from this file
+        preserve_times: Also copy timestamps from meta_src, like shutil.copy2
+
+    Returns:
+        True if the file was written, False if it was already up to date
+    """
+    if isinstance(data, str):
+        if os.linesep != "\n":
+            data = data.replace("\n", os.linesep)
+        data = data.encode("utf-8")
+    if file_has_content(path, data):
+        STATS.unchanged()
+        return False
+
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        if meta_src is None:
+            os.chmod(tmp_name, 0o666 & ~_UMASK)
+        elif preserve_times:
+            shutil.copystat(meta_src, tmp_name)
+        else:
+            shutil.copymode(meta_src, tmp_name)
+        os.replace(tmp_name, path)
+        STATS.wrote(len(data))
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    return True
+
+
+class _ComparingWriter:
+    """File wrapper that checks whether the data written equals an existing file.
+
+    The existing file is read alongside in the same block sizes, which is
+    cheaper than hashing both and stops reading at the first difference.
+    """
+
+    def __init__(self, f, existing: Path):
+        self.f = f
+        try:
+            self.other = open(existing, "rb")
+        except OSError:
+            self.other = None
+
+    def write(self, data: bytes) -> int:
+        if self.other is not None and self.other.read(len(data)) != data:
+            self._stop_comparing()
+        return self.f.write(data)
+
+    def _stop_comparing(self) -> None:
+        if self.other is not None:
+            self.other.close()
+            self.other = None
+
+    def matches(self) -> bool:
+        """True if everything was equal and the existing file has no more data."""
+        same = self.other is not None and not self.other.read(1)
+        self._stop_comparing()
+        return same
+
+
+def _replace_with_temp(path: Path, fill, meta_src: Path, preserve_times: bool) -> bool:
+    """Build a new version of path in a temp file; keep the old one if identical.
+
+    Args:
+        fill: Called with the open temp file; writes the new content in chunks
+            and returns False to abandon the write (the temp file is removed)
+
+    Returns:
+        True if path was replaced
+    """
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            out = _ComparingWriter(f, path)
+            complete = fill(out) is not False
+            same = out.matches()
+        if not complete:
+            os.unlink(tmp_name)
+            return False
+        size = os.stat(tmp_name).st_size
+        if same:
+            os.unlink(tmp_name)
+            STATS.unchanged()
+            return False
+        if preserve_times:
+            shutil.copystat(meta_src, tmp_name)
+        else:
+            shutil.copymode(meta_src, tmp_name)
+        os.replace(tmp_name, path)
+        STATS.wrote(size)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    return True
+
+
+def stream_rewrite_file(src: Path, dst: Path) -> Optional[bool]:
+    """Rewrite paths from src into dst in fixed-size chunks.
+
+    Memory stays at a few chunks regardless of file size. src and dst may be
+    the same file: the output goes to a temp file that replaces dst at the end.
+
+    Returns:
+        True if dst was written, False if it already had this content, None if
+        src turned out to be binary or not UTF-8 (dst is then left untouched)
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    usable = True
+
+    def fill(out) -> bool:
+        nonlocal usable
+        carry = b""
+        with open(src, "rb") as f:
+            chunk = f.read(STREAM_CHUNK_SIZE)
+            if is_probably_binary(chunk):
+                usable = False
+                return False
+            while chunk:
+                try:
+                    decoder.decode(chunk)  # Validate only; the text is discarded
+                except UnicodeDecodeError:
+                    usable = False
+                    return False
+                nxt = f.read(STREAM_CHUNK_SIZE)
+                data, carry = PATH_REWRITER.rewrite_chunk(carry + chunk, final=not nxt)
+                out.write(data)
+                chunk = nxt
+            try:
+                decoder.decode(b"", final=True)
+            except UnicodeDecodeError:
+                usable = False
+                return False
+        return True
+
+    written = _replace_with_temp(dst, fill, meta_src=src, preserve_times=False)
+    return written if usable else None
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# COPY ENGINE
+# ═══════════════════════════════════════════════════════════════════════════
+
+# How files that need no content change are placed in .opencode (--link-mode)
+LINK_MODES = ("copy", "hardlink", "symlink")
+LINK_MODE = "copy"
+# ioctl request from linux/fs.h: make dst share src's extents (btrfs, XFS, ...)
+FICLONE = 0x40049409
+# Trees with at least this many files are copied by a thread pool
+PARALLEL_COPY_MIN_FILES = 16
+
+
+def generation_config() -> str:
+    """Fingerprint of the settings that shape every output (see Manifest.load).
+
+    Covers the rewrite table and the link mode. The default copy mode adds
+    nothing, so manifests written before the link mode was tracked stay valid.
+    """
+    config = PATH_REWRITER.fingerprint()
+    if LINK_MODE != "copy":
+        config = hash_text(f"{config}\nlink-mode={LINK_MODE}")
+    return config
+
+
+def copy_file_data(fsrc, fdst) -> None:
+    """Copy between two open binary files with the cheapest available mechanism.
+
+    Tries a reflink (FICLONE), then os.copy_file_range and os.sendfile, which
+    keep the data in the kernel, and finally a plain buffered copy. Each step
+    continues from wherever the previous one stopped.
+    """
+    in_fd, out_fd = fsrc.fileno(), fdst.fileno()
+    size = os.fstat(in_fd).st_size
+    if size == 0:
+        return
+    if fcntl is not None:
+        try:
+            fcntl.ioctl(out_fd, FICLONE, in_fd)
+            return
+        except OSError:
+            pass  # Not supported by this filesystem, or across devices
+    offset = 0
+    if hasattr(os, "copy_file_range"):
+        try:
+            while offset < size:
+                sent = os.copy_file_range(in_fd, out_fd, size - offset, offset, offset)
+                if sent == 0:
+                    break
+                offset += sent
+        except OSError:
+            pass
+    if offset < size and hasattr(os, "sendfile"):
+        try:
+            os.lseek(out_fd, offset, os.SEEK_SET)
+            while offset < size:
+                sent = os.sendfile(out_fd, in_fd, offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+        except OSError:
+            pass
+    if offset < size:
+        fsrc.seek(offset)
+        fdst.seek(offset)
+        shutil.copyfileobj(fsrc, fdst, STREAM_CHUNK_SIZE)
+
+
+def kernel_copy(src: Path, dst: Path) -> None:
+    """Copy a file's data (not its metadata) using copy_file_data."""
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        copy_file_data(fsrc, fdst)
+
+
+def _is_placed(src_st: os.stat_result, dst: Path, link_target: str) -> bool:
+    """Check whether dst already is what place_file would create."""
     try:
-        content = file_path.read_text(encoding="utf-8")
-        if ".claude/" in content:
-            content = content.replace(".claude/", ".opencode/")
-            file_path.write_text(content, encoding="utf-8")
-    except (UnicodeDecodeError, PermissionError):
-        pass  # Skip binary files or files we can't access
+        dst_st = dst.lstat()
+    except OSError:
+        return False
+    same_inode = (dst_st.st_ino, dst_st.st_dev) == (src_st.st_ino, src_st.st_dev)
+    if LINK_MODE == "symlink":
+        return stat.S_ISLNK(dst_st.st_mode) and os.readlink(dst) == link_target
+    if LINK_MODE == "hardlink":
+        return same_inode
+    # Copies keep the source mtime, so size and mtime identify them (like rsync)
+    return (
+        stat.S_ISREG(dst_st.st_mode) and not same_inode
+        and (dst_st.st_size, dst_st.st_mtime_ns) == (src_st.st_size, src_st.st_mtime_ns)
+    )
+
+
+def place_file(src: Path, dst: Path) -> bool:
+    """Put an unmodified source file at dst according to LINK_MODE.
+
+    "copy" clones the data with kernel_copy and keeps metadata like
+    shutil.copy2; "hardlink" and "symlink" (relative) link to the source and
+    fall back to a copy where links are not possible. The result is built
+    under a temp name and renamed over dst, so a file is never half-written.
+
+    Returns:
+        True if dst was (re)created, False if it was already in place
+    """
+    src_st = src.stat()
+    link_target = os.path.relpath(src, dst.parent)
+    if _is_placed(src_st, dst, link_target):
+        STATS.unchanged()
+        return False
+
+    # Unique per process and thread, so it needs no exclusive create (links
+    # cannot be made with O_EXCL anyway); a leftover from a crash is replaced
+    tmp_name = str(dst.parent / f".{dst.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        linked = False
+        if LINK_MODE != "copy":
+            try:
+                if LINK_MODE == "hardlink":
+                    os.link(src, tmp_name)
+                else:
+                    os.symlink(link_target, tmp_name)
+                linked = True
+            except FileExistsError:
+                os.unlink(tmp_name)
+                return place_file(src, dst)
+            except OSError:
+                pass  # Cross-device, unsupported or not permitted: copy instead
+        if not linked:
+            with open(src, "rb") as fsrc, open(tmp_name, "wb") as fdst:
+                copy_file_data(fsrc, fdst)
+            shutil.copystat(src, tmp_name)
+        os.replace(tmp_name, dst)
+        STATS.wrote(0 if linked else src_st.st_size)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    return True
+
+
+# Files inside copied trees whose .claude/ references are rewritten
+REWRITE_SUFFIXES = (".md", ".py")
+
+
+def copy_file_with_rewrite(src: Path, dst: Path, rewrite: bool = True) -> bool:
+    """Copy a file, replacing .claude/ paths with .opencode/ in flight.
+
+    The source is read once and written (atomically, and only if different)
+    once. Files that are binary, not UTF-8 or contain no .claude/ reference
+    need no change and are handed to place_file (copied byte-for-byte with
+    their metadata, or linked with --link-mode). Files with rewrite=False are
+    never read in Python at all.
+
+    Files of STREAM_MIN_SIZE or more are processed in chunks instead.
+
+    Returns:
+        True if the destination was written
+    """
+    if not rewrite:
+        STATS.read(src.stat().st_size)
+        return place_file(src, dst)
+    size = src.stat().st_size
+    if size >= STREAM_MIN_SIZE:
+        STATS.read(size)
+        if file_needs_rewrite(src):
+            written = stream_rewrite_file(src, dst)
+            if written is not None:
+                return written
+        return place_file(src, dst)
+    data = src.read_bytes()
+    STATS.read(len(data))
+    rewritten = rewrite_claude_paths_bytes(data)
+    if rewritten is not None:
+        return write_if_changed(dst, rewritten, meta_src=src)
+    return place_file(src, dst)
+
+
+def remove_temp_files(path: Path) -> None:
+    """Delete temp files left next to path by an interrupted atomic write."""
+    prefix = f".{path.name}."
+    try:
+        with os.scandir(path.parent) as it:
+            leftovers = [e.path for e in it if e.name.startswith(prefix) and e.name.endswith(".tmp")]
+    except OSError:
+        return
+    for leftover in leftovers:
+        try:
+            os.unlink(leftover)
+        except OSError:
+            pass
+
+
+def remove_path(path: Path) -> None:
+    """Delete a file, symlink or directory tree."""
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path)
+    else:
+        path.unlink()
+
+
+def copy_tree_with_rewrite(index: "SourceIndex", rel: str, dst_dir: Path) -> int:
+    """Sync an indexed source directory into dst_dir in a single pass.
+
+    Markdown and Python files get their .claude/ paths rewritten while being
+    copied; everything else is placed raw by place_file. Files whose content is
+    unchanged are not rewritten, and files or directories in dst_dir that no
+    longer exist in the source are removed, so the tree is never deleted and
+    recreated. The directory structure is synced first; files are then copied
+    by a thread pool when there are many of them (the kernel copies and
+    hashing release the GIL).
+
+    Returns:
+        Number of files written
+    """
+    prefix_len = len(rel) + 1
+    if dst_dir.exists() and not dst_dir.is_dir():
+        dst_dir.unlink()
+    dst_dir.mkdir(parents=True, exist_ok=True)
+    jobs = []
+    stack = [(rel, dst_dir)]
+    while stack:
+        src_rel, target_dir = stack.pop()
+        expected = set()
+        for entry in index.listdir(src_rel):
+            target = dst_dir / entry.rel[prefix_len:]
+            expected.add(target.name)
+            if entry.is_dir:
+                if target.exists() and not target.is_dir():
+                    target.unlink()
+                target.mkdir(exist_ok=True)
+                stack.append((entry.rel, target))
+            else:
+                if target.is_dir() and not target.is_symlink():
+                    shutil.rmtree(target)
+                jobs.append((entry, target))
+        # Drop outputs whose source was deleted or renamed
+        with os.scandir(target_dir) as it:
+            stale = [Path(e.path) for e in it if e.name not in expected]
+        for path in stale:
+            remove_path(path)
+
+    def copy_one(job) -> bool:
+        entry, target = job
+        start = time.perf_counter()
+        written = copy_file_with_rewrite(entry.path, target, entry.rel.endswith(REWRITE_SUFFIXES))
+        STATS.file_time(entry.path, time.perf_counter() - start)
+        return written
+
+    if len(jobs) < PARALLEL_COPY_MIN_FILES:
+        return sum(map(copy_one, jobs))
+    with ThreadPoolExecutor() as pool:
+        return sum(pool.map(copy_one, jobs))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# FRONTMATTER SCANNER
+# ═══════════════════════════════════════════════════════════════════════════
+
+# "key: value" line; the key may be quoted, the value is optional
+_KEY_RE = re.compile(
+    r"""(?P<key>"(?:[^"\\]|\\.)*"|'(?:[^']|'')*'|-?[^\s#'"\-:](?:[^:#\n]*[^\s:#])?)"""
+    r"""[ \t]*:(?:[ \t]+(?P<value>.*\S))?\s*$"""
+)
+# Block scalar header: | or > with optional chomping and indentation indicators
+_BLOCK_HEADER_RE = re.compile(r"([|>])([+-]?)([1-9]?)[+-]?(?:[ \t]+#.*)?$")
+# Flat frontmatter (only "key: inline value" lines, blanks and comments) is by
+# far the most common shape; it is split by one C-level scan and only falls
+# back to a full validation pass when blank or comment lines are present
+_FLAT_KEY = r"""[^\s#'"\-:|>](?:[^:#\n]*[^\s:#])?"""
+_FLAT_VALUE = r"[^|>\s#](?:[^\n]*[^\s])?"
+_FLAT_BLOCK_RE = re.compile(
+    rf"(?:(?:{_FLAT_KEY}[ \t]*:[ \t]+{_FLAT_VALUE}[ \t\r]*|[ \t]*(?:#[^\n]*)?)(?:\n|\Z))*"
+)
+_FLAT_PAIR_RE = re.compile(rf"^({_FLAT_KEY})[ \t]*:[ \t]+({_FLAT_VALUE})", re.MULTILINE)
+# Flow list of plain scalars, e.g. "[a, b]"; anything fancier takes the slow path
+_SIMPLE_FLOW_RE = re.compile(r"\[([^\[\]{}'\"#\n]*)\]")
+_DQ_RE = re.compile(r'"((?:[^"\\]|\\.)*)"')
+_SQ_RE = re.compile(r"'((?:[^']|'')*)'")
+_DQ_ESCAPE_RE = re.compile(r'\\(u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|.)')
+_DQ_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "0": "\0", '"': '"', "\\": "\\", "/": "/", " ": " ", "e": "\x1b"}
+
+
+def _find_closing_fence(content: str, start: int) -> Optional[tuple[int, int]]:
+    """Find the next line that is exactly "---" (trailing blanks allowed).
+
+    Args:
+        start: Offset of the newline that ends the opening fence
+
+    Returns:
+        (line start, line end) of the fence, or None
+    """
+    pos = start
+    while True:
+        pos = content.find("\n---", pos)
+        if pos == -1:
+            return None
+        line_end = content.find("\n", pos + 4)
+        if line_end == -1:
+            line_end = len(content)
+        if not content[pos + 4:line_end].strip():
+            return pos + 1, line_end
+        pos += 4
+
+
+def _indent_of(line: str) -> int:
+    return len(line) - len(line.lstrip(" \t"))
+
+
+def _unescape_double(text: str) -> str:
+    def sub(m):
+        esc = m.group(1)
+        if esc[0] in "ux" and len(esc) > 1:
+            return chr(int(esc[1:], 16))
+        return _DQ_ESCAPES.get(esc, m.group(0))
+    return _DQ_ESCAPE_RE.sub(sub, text) if "\\" in text else text
+
+
+def _parse_quoted(text: str) -> tuple[str, int]:
+    """Parse a quoted scalar at the start of text; return (value, end offset)."""
+    if text[0] == '"':
+        m = _DQ_RE.match(text)
+        if m:
+            return _unescape_double(m.group(1)), m.end()
+    else:
+        m = _SQ_RE.match(text)
+        if m:
+            return m.group(1).replace("''", "'"), m.end()
+    return text, len(text)  # Unterminated: keep verbatim
+
+
+def _strip_comment(text: str) -> str:
+    """Drop a trailing " # comment" from a plain scalar."""
+    if "#" not in text:
+        return text
+    pos = text.find(" #")
+    if pos == -1:
+        pos = text.find("\t#")
+    return text[:pos].rstrip() if pos != -1 else text
+
+
+def _parse_flow_list(text: str) -> Optional[list]:
+    """Parse "[a, 'b, c', "d"]"; None if text is not a complete flow list."""
+    simple = _SIMPLE_FLOW_RE.fullmatch(text)
+    if simple:
+        return [item for item in map(str.strip, simple.group(1).split(",")) if item]
+    items = []
+    i, n = 1, len(text)
+    while i < n:
+        while i < n and text[i] in " \t":
+            i += 1
+        if i < n and text[i] == "]":
+            rest = text[i + 1:].strip()
+            return items if not rest or rest.startswith("#") else None
+        if i < n and text[i] in "'\"":
+            value, used = _parse_quoted(text[i:])
+            i += used
+        else:
+            start = i
+            while i < n and text[i] not in ",]":
+                i += 1
+            value = text[start:i].strip()
+            if not value:
+                i += 1 if i < n and text[i] == "," else 0
+                continue
+        items.append(value)
+        while i < n and text[i] in " \t":
+            i += 1
+        if i < n and text[i] == ",":
+            i += 1
+    return None
+
+
+def _parse_scalar(raw: str):
+    """Parse an inline value. Plain scalars stay strings (no type resolution)."""
+    if raw[0] in "'\"":
+        value, end = _parse_quoted(raw)
+        rest = raw[end:].strip()
+        if not rest or rest.startswith("#"):
+            return value
+        return raw  # Not a single quoted scalar; keep as written
+    if raw[0] == "[":
+        items = _parse_flow_list(raw)
+        if items is not None:
+            return items
+    return _strip_comment(raw)
+
+
+def _parse_block_scalar(lines: list[str], i: int, parent_indent: int, header) -> tuple[str, int]:
+    """Collect a | or > block scalar starting at lines[i]."""
+    style, chomp, explicit = header.group(1), header.group(2), header.group(3)
+    block_indent = parent_indent + int(explicit) if explicit else None
+    collected = []
+    n = len(lines)
+    while i < n:
+        line = lines[i]
+        if not line.strip():
+            collected.append("")
+            i += 1
+            continue
+        indent = _indent_of(line)
+        if block_indent is None:
+            if indent <= parent_indent:
+                break
+            block_indent = indent
+        if indent < block_indent:
+            break
+        collected.append(line[block_indent:])
+        i += 1
+
+    # Trailing blank lines belong to chomping, not content
+    content_end = len(collected)
+    while content_end and not collected[content_end - 1]:
+        content_end -= 1
+    trailing = len(collected) - content_end
+    body_lines = collected[:content_end]
+
+    if style == "|":
+        text = "\n".join(body_lines)
+    else:
+        # Folding: a break between two plain lines becomes a space, blank lines
+        # become newlines, and more-indented lines keep their breaks
+        text = body_lines[0] if body_lines else ""
+        for prev, line in zip(body_lines, body_lines[1:]):
+            if not line:
+                text += "\n"
+            elif line[0] in " \t" or (prev and prev[0] in " \t"):
+                text += "\n" + line
+            elif not prev:
+                text += line
+            else:
+                text += " " + line
 
+    if not body_lines or chomp == "-":
+        return text, i
+    if chomp == "+":
+        return text + "\n" * (trailing + 1), i
+    return text + "\n", i
 
-def replace_claude_paths_in_dir(dir_path: Path) -> None:
-    """Replace .claude/ paths with .opencode/ in markdown and Python files."""
-    for pattern in ["*.md", "*.py"]:
-        for file in dir_path.rglob(pattern):
-            replace_claude_paths_in_file(file)
+
+def _parse_plain_lines(lines: list[str], i: int, parent_indent: int):
+    """Collect a plain scalar written on the lines below its key.
+
+    Lines are folded as YAML does: breaks become spaces and blank lines
+    become newlines. A comment ends the scalar.
+    """
+    parts = []
+    breaks = 0
+    n = len(lines)
+    while i < n:
+        stripped = lines[i].strip()
+        if not stripped:
+            breaks += 1
+            i += 1
+            continue
+        if _indent_of(lines[i]) <= parent_indent or stripped.startswith("#"):
+            break
+        if parts:
+            parts.append("\n" * breaks if breaks else " ")
+        breaks = 0
+        text = _strip_comment(stripped)
+        parts.append(text)
+        i += 1
+        if text != stripped:
+            break
+    if len(parts) == 1 and parts[0][0] in "'\"[":
+        return _parse_scalar(parts[0]), i
+    return "".join(parts), i
+
+
+def _parse_block_list(lines: list[str], i: int, indent: int) -> tuple[list, int]:
+    """Collect "- item" entries at the given indentation."""
+    items = []
+    n = len(lines)
+    while i < n:
+        line = lines[i]
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            i += 1
+            continue
+        if _indent_of(line) != indent or not (stripped == "-" or stripped.startswith("- ")):
+            break
+        raw = stripped[2:].strip() if stripped != "-" else ""
+        items.append(_parse_scalar(raw) if raw else "")
+        i += 1
+    return items, i
+
+
+def _parse_mapping(lines: list[str], i: int, indent: int) -> tuple[dict, int]:
+    """Parse "key: value" lines at the given indentation (and their children)."""
+    result = {}
+    n = len(lines)
+    while i < n:
+        line = lines[i]
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            i += 1
+            continue
+        line_indent = _indent_of(line)
+        if line_indent < indent:
+            break
+        match = _KEY_RE.match(line, line_indent)
+        i += 1
+        if match is None or line_indent > indent:
+            continue  # Unsupported syntax: skip the line rather than fail
+
+        key = match.group("key")
+        if key[0] in "'\"":
+            key = _parse_quoted(key)[0]
+        raw = match.group("value") or ""
+
+        header = _BLOCK_HEADER_RE.match(raw) if raw[:1] in ("|", ">") else None
+        if header:
+            value, i = _parse_block_scalar(lines, i, line_indent, header)
+        elif raw and not raw.startswith("#"):
+            value = _parse_scalar(raw)
+        else:
+            # Empty value: may introduce a nested mapping, a block list or a
+            # plain scalar continued on the following lines
+            j = i
+            while j < n and (not lines[j].strip() or lines[j].strip().startswith("#")):
+                j += 1
+            value = ""
+            if j < n:
+                child = lines[j]
+                child_indent = _indent_of(child)
+                child_stripped = child.strip()
+                is_item = child_stripped == "-" or child_stripped.startswith("- ")
+                if is_item and child_indent >= line_indent:
+                    value, i = _parse_block_list(lines, j, child_indent)
+                elif child_indent > line_indent and _KEY_RE.match(child, child_indent):
+                    value, i = _parse_mapping(lines, j, child_indent)
+                elif child_indent > line_indent:
+                    value, i = _parse_plain_lines(lines, j, line_indent)
+        result[key] = value
+    return result, i
+
+
+def scan_frontmatter(content: str) -> tuple[dict, int]:
+    """Parse YAML frontmatter in one pass without copying the document body.
+
+    The opening fence must be the first line and the closing fence is the next
+    line consisting of "---", so "---" inside values or the body is harmless.
+    Supports the YAML subset used by agent and command files: plain, single-
+    and double-quoted scalars, flow lists, block lists, | and > block scalars
+    (with chomping indicators), comments and nested mappings. Plain scalars
+    are returned as strings; no type resolution is done.
+
+    Returns:
+        (frontmatter, body_offset): body_offset is the index in content where
+        the body starts (0 when there is no frontmatter)
+    """
+    if not content.startswith("---"):
+        return {}, 0
+    first_nl = content.find("\n")
+    if first_nl == -1 or content[3:first_nl].strip():
+        return {}, 0
+    fence = _find_closing_fence(content, first_nl)
+    if fence is None:
+        return {}, 0
+    block = content[first_nl + 1:fence[0]]
+    pairs = _FLAT_PAIR_RE.findall(block)
+    # One match per line means every line is a flat pair
+    if len(pairs) == block.count("\n") or _FLAT_BLOCK_RE.fullmatch(block):
+        frontmatter = {
+            key: _parse_scalar(value) if value[0] in "'\"[" or "#" in value else value
+            for key, value in pairs
+        }
+    else:
+        frontmatter, _ = _parse_mapping(block.splitlines(), 0, 0)
+    return frontmatter, fence[1]
 
 
 def parse_yaml_frontmatter(content: str) -> tuple[dict, str]:
     """Parse YAML frontmatter from markdown content.
 
-    Handles block scalars (>-, |, etc.) by collecting indented lines.
+    Returns the frontmatter dict and the body (whitespace-stripped when a
+    frontmatter block was found, otherwise the content unchanged). See
+    scan_frontmatter for the supported YAML subset.
     """
-    frontmatter = {}
-    body = content
+    frontmatter, offset = scan_frontmatter(content)
+    return frontmatter, body_at(content, offset)
 
-    if content.startswith("---"):
-        parts = content.split("---", 2)
-        if len(parts) >= 3:
-            yaml_content = parts[1].strip()
-            body = parts[2].strip()
 
-            lines = yaml_content.split("\n")
-            i = 0
-            while i < len(lines):
-                line = lines[i]
-                stripped = line.strip()
+def body_at(content: str, offset: int) -> str:
+    """Body for a scan_frontmatter offset, as parse_yaml_frontmatter returns it."""
+    if offset == 0:
+        return content
+    return content[offset:].strip()
 
-                # Skip empty lines
-                if not stripped:
-                    i += 1
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PARSE CACHE
+# ═══════════════════════════════════════════════════════════════════════════
+
+CACHE_DIR_NAME = ".cache"
+PARSE_CACHE_NAME = "frontmatter.sqlite"
+# Bump when scan_frontmatter output changes so old cache entries are dropped
+PARSE_CACHE_VERSION = 2
+DEFAULT_PARSE_CACHE_MB = 16
+
+
+class ParseCache:
+    """On-disk cache of scan_frontmatter results in .opencode/.cache/.
+
+    Rows are keyed by source path and hold the size, mtime and SHA-256 the
+    source had when parsed, plus the frontmatter (as JSON) and body offset.
+    A row with the same size and mtime is used as is; if only the mtime moved,
+    the worker that reads the file checks the hash before trusting it. Least
+    recently used rows are evicted once the cache exceeds its size cap.
+
+    Lookups and stores happen in the main process only; workers receive the
+    cached result with their job and send fresh parses back with the output.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, max_bytes: int):
+        self.conn = conn
+        self.max_bytes = max_bytes
+        self.clock = time.time_ns()
+        self.touched: list[tuple[int, str]] = []
+
+    @classmethod
+    def open(cls, opencode_dir: Path, max_bytes: int) -> Optional["ParseCache"]:
+        """Open (or create) the cache; None if it is disabled or unusable."""
+        if max_bytes <= 0:
+            return None
+        path = opencode_dir / CACHE_DIR_NAME / PARSE_CACHE_NAME
+        for attempt in range(2):
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(path)
+                if conn.execute("PRAGMA user_version").fetchone()[0] != PARSE_CACHE_VERSION:
+                    conn.execute("DROP TABLE IF EXISTS entries")
+                    conn.execute(f"PRAGMA user_version = {PARSE_CACHE_VERSION}")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS entries (path TEXT PRIMARY KEY, size INTEGER,"
+                    " mtime_ns INTEGER, hash TEXT, data TEXT, used INTEGER)"
+                )
+                return cls(conn, max_bytes)
+            except (OSError, sqlite3.Error) as e:
+                if attempt == 0 and isinstance(e, sqlite3.DatabaseError):
+                    path.unlink(missing_ok=True)  # Corrupt file: start over once
                     continue
+                print(f"Warning: parse cache disabled ({e})", file=sys.stderr)
+        return None
 
-                if ":" in stripped:
-                    key, value = stripped.split(":", 1)
-                    key = key.strip()
-                    value = value.strip()
-
-                    # Handle block scalars (>-, >, |-, |)
-                    if value in (">-", ">", "|-", "|"):
-                        # Collect all indented lines that follow
-                        block_lines = []
-                        i += 1
-                        while i < len(lines):
-                            next_line = lines[i]
-                            # Check if line is indented (part of block)
-                            if next_line.startswith("  ") or next_line.startswith("\t"):
-                                block_lines.append(next_line.strip())
-                                i += 1
-                            elif next_line.strip() == "":
-                                # Empty line might be part of block
-                                i += 1
-                            else:
-                                # Non-indented line = end of block
-                                break
-                        # Join block lines (folded style uses space)
-                        value = " ".join(block_lines)
-                        frontmatter[key] = value
-                        continue
+    def get(self, entry: SourceEntry) -> Optional[tuple]:
+        """Cached (frontmatter, offset, hash) for a source, or None.
+
+        hash is None when size and mtime match, so the result can be used
+        without reading the file; otherwise the caller must compare it.
+        """
+        row = self.conn.execute(
+            "SELECT size, mtime_ns, hash, data FROM entries WHERE path = ?", (entry.rel,)
+        ).fetchone()
+        if row is None or row[0] != entry.size:
+            return None
+        frontmatter, offset = json.loads(row[3])
+        self.touched.append((self.clock, entry.rel))
+        return frontmatter, offset, None if row[1] == entry.mtime_ns else row[2]
+
+    def put(self, entry: SourceEntry, parsed: tuple) -> None:
+        """Store a (frontmatter, offset, hash) result for a source."""
+        frontmatter, offset, digest = parsed
+        self.conn.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+            (entry.rel, entry.size, entry.mtime_ns, digest,
+             json.dumps([frontmatter, offset], ensure_ascii=False), self.clock),
+        )
+
+    def close(self) -> None:
+        """Record access times, evict past the size cap and commit."""
+        try:
+            self.conn.executemany("UPDATE entries SET used = ? WHERE path = ?", self.touched)
+            total = 0
+            evict = []
+            for key, nbytes in self.conn.execute(
+                "SELECT path, length(data) + length(path) FROM entries ORDER BY used DESC"
+            ):
+                total += nbytes
+                if total > self.max_bytes:
+                    evict.append((key,))
+            self.conn.executemany("DELETE FROM entries WHERE path = ?", evict)
+            self.conn.commit()
+        except sqlite3.Error as e:
+            print(f"Warning: could not update parse cache ({e})", file=sys.stderr)
+        finally:
+            self.conn.close()
+
+
+def read_markdown(path: Path, cached: Optional[tuple] = None) -> tuple[dict, str, Optional[tuple]]:
+    """Read a markdown source and split it into frontmatter and body.
 
-                    # Handle quoted strings
-                    if value.startswith('"') and value.endswith('"'):
-                        value = value[1:-1]
-                    elif value.startswith("'") and value.endswith("'"):
-                        value = value[1:-1]
-                    # Handle arrays
-                    elif value.startswith("[") and value.endswith("]"):
-                        value = [v.strip().strip("'\"") for v in value[1:-1].split(",")]
+    Args:
+        path: Source file
+        cached: (frontmatter, offset, hash) from ParseCache.get; used instead of
+            parsing when hash is None or matches the file content
 
-                    frontmatter[key] = value
-                i += 1
+    Returns:
+        (frontmatter, body, parsed): parsed is the (frontmatter, offset, hash)
+        to store in the cache, or None when the cached entry was used as is
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+
+    if cached is not None:
+        frontmatter, offset, digest = cached
+        if digest is None:
+            return frontmatter, body_at(content, offset), None
+        digest_now = hash_text(content)
+        if digest == digest_now:
+            # Same content with a new mtime: store it again to refresh the key
+            return frontmatter, body_at(content, offset), (frontmatter, offset, digest)
+    else:
+        digest_now = hash_text(content)
 
-    return frontmatter, body
+    frontmatter, offset = scan_frontmatter(content)
+    return frontmatter, body_at(content, offset), (frontmatter, offset, digest_now)
 
 
 def convert_claude_agent_to_opencode(claude_agent: dict, body: str, agent_name: str) -> tuple[dict, str]:
@@ -151,7 +1818,7 @@ def convert_claude_agent_to_opencode(claude_agent: dict, body: str, agent_name:
     }
 
     # Replace .claude/ paths with .opencode/ in body
-    body = body.replace(".claude/", ".opencode/")
+    body = rewrite_claude_paths(body)
 
     return opencode_frontmatter, body
 
@@ -170,96 +1837,302 @@ def convert_claude_command_to_opencode(claude_cmd: dict, body: str, cmd_name: st
     # Convert argument-hint to description if more descriptive
     if "argument-hint" in claude_cmd:
         hint = claude_cmd["argument-hint"]
-        if hint and "[" not in opencode_frontmatter.get("description", ""):
-            opencode_frontmatter["description"] = (
-                opencode_frontmatter.get("description", "") + f" - Args: {hint}"
-            )
+        description = opencode_frontmatter["description"]
+        if hint and isinstance(description, str) and "[" not in description:
+            # Block scalar descriptions (| or >) keep their trailing newline
+            opencode_frontmatter["description"] = description.strip() + f" - Args: {hint}"
 
     # Replace .claude/ paths with .opencode/ in body
-    body = body.replace(".claude/", ".opencode/")
+    body = rewrite_claude_paths(body)
 
     return opencode_frontmatter, body
 
 
-def generate_yaml_frontmatter(data: dict) -> str:
-    """Generate YAML frontmatter string from dict."""
-    lines = ["---"]
-
-    def format_value(v, use_block_scalar=False):
-        if isinstance(v, bool):
-            return "true" if v else "false"
-        elif isinstance(v, str):
-            # For multiline strings or strings with special chars, use block scalar
-            if use_block_scalar and ("\n" in v or len(v) > 100):
-                # Use YAML block scalar (literal style |)
-                return None  # Signal to use block scalar
-            # Escape special characters and wrap in quotes if needed
-            if "\n" in v or '"' in v or ":" in v or "'" in v or v.startswith(" "):
-                # Escape internal quotes and use double quotes
-                escaped = v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
-                return f'"{escaped}"'
-            elif " " in v:
-                return f'"{v}"'
-            return v
-        elif isinstance(v, list):
-            return "[" + ", ".join(str(format_value(item)) for item in v if format_value(item)) + "]"
-        elif isinstance(v, dict):
-            return None  # Handle separately
-        return str(v)
+# ═══════════════════════════════════════════════════════════════════════════
+# FRONTMATTER SERIALIZER
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Longest description kept in the frontmatter (longer ones end in "...")
+MAX_DESCRIPTION_LENGTH = 200
+
 
+def _yaml_str(value: str) -> str:
+    """Quote a string when needed; newlines inside quotes become spaces."""
+    # Substring tests run at memchr speed; on short strings they beat both a
+    # character-class regex and str.translate several times over
+    if "\n" in value or '"' in value or ":" in value or "'" in value or value[:1] == " ":
+        return '"' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ") + '"'
+    return '"' + value + '"' if " " in value else value
+
+
+def _yaml_inline(value) -> Optional[str]:
+    """Format a value for a single line; None for values that cannot be inlined."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, str):
+        return _yaml_str(str(value))
+    if isinstance(value, dict):
+        return None
+    if isinstance(value, list):
+        # Empty strings and nested mappings are left out of flow lists
+        items = [_yaml_inline(item) for item in value]
+        return "[" + ", ".join([item for item in items if item]) + "]"
+    return str(value)
+
+
+def _yaml_description(value: str) -> str:
+    """First part of a description on one line, truncated and quoted."""
+    desc = value.replace("\n", " ").strip()
+    # Remove examples and extra content - keep just the main description
+    if "<example>" in desc:
+        desc = desc.split("<example>")[0].strip()
+    if "Examples:" in desc:
+        desc = desc.split("Examples:")[0].strip()
+    if len(desc) > MAX_DESCRIPTION_LENGTH:
+        desc = desc[:MAX_DESCRIPTION_LENGTH - 3] + "..."
+    return '"' + desc.replace('"', '\\"') + '"'
+
+
+def _yaml_mapping(data: dict, indent: str, out: list[str]) -> None:
+    """Append "key: value" lines for a mapping, recursing into nested mappings."""
+    append = out.append
     for key, value in data.items():
-        if isinstance(value, dict):
-            lines.append(f"{key}:")
-            for sub_key, sub_value in value.items():
-                formatted = format_value(sub_value)
-                if formatted is not None:
-                    lines.append(f"  {sub_key}: {formatted}")
-        elif key == "description" and isinstance(value, str):
-            # For description, truncate to first sentence if too long
-            desc = value.replace("\n", " ").strip()
-            # Remove examples and extra content - keep just the main description
-            if "<example>" in desc:
-                desc = desc.split("<example>")[0].strip()
-            if "Examples:" in desc:
-                desc = desc.split("Examples:")[0].strip()
-            # Truncate if still too long (max 200 chars for clean YAML)
-            if len(desc) > 200:
-                desc = desc[:197] + "..."
-            # Escape and quote
-            desc = desc.replace('"', '\\"')
-            lines.append(f'{key}: "{desc}"')
+        # Exact-type checks first: str and bool cover nearly every value
+        cls = value.__class__
+        if cls is not str and cls is not bool and isinstance(value, str):
+            value, cls = str(value), str
+        if cls is str:
+            if key == "description" and not indent:
+                append(f"{key}: {_yaml_description(value)}")
+            else:
+                append(f"{indent}{key}: {_yaml_str(value)}")
+        elif cls is bool:
+            append(f"{indent}{key}: {'true' if value else 'false'}")
+        elif isinstance(value, dict):
+            append(f"{indent}{key}:")
+            _yaml_mapping(value, indent + "  ", out)
         else:
-            formatted = format_value(value)
+            formatted = _yaml_inline(value)
             if formatted is not None:
-                lines.append(f"{key}: {formatted}")
+                append(f"{indent}{key}: {formatted}")
+
+
+def generate_yaml_frontmatter(data: dict) -> str:
+    """Generate YAML frontmatter string from dict.
+
+    Strings are double-quoted when they contain spaces, quotes, colons or
+    newlines; top-level descriptions are collapsed to one line and truncated.
+    Nested mappings are written as indented blocks and lists as flow lists.
+    """
+    out = ["---"]
+    _yaml_mapping(data, "", out)
+    out.append("---")
+    return "\n".join(out)
+
 
-    lines.append("---")
-    return "\n".join(lines)
+def render_agent(frontmatter: dict, body: str, agent_name: str) -> str:
+    """Return the OpenCode agent file content for a parsed Claude agent."""
+    opencode_fm, opencode_body = convert_claude_agent_to_opencode(frontmatter, body, agent_name)
+    return generate_yaml_frontmatter(opencode_fm) + "\n\n" + opencode_body
 
 
-def backup_opencode_dir(opencode_dir: Path) -> Optional[Path]:
-    """Create backup of .opencode directory before overwriting.
+def render_command(frontmatter: dict, body: str, cmd_name: str) -> str:
+    """Return the OpenCode command file content for a parsed Claude command."""
+    opencode_fm, opencode_body = convert_claude_command_to_opencode(frontmatter, body, cmd_name)
+    return generate_yaml_frontmatter(opencode_fm) + "\n\n" + opencode_body
+
+
+def _convert_job(job: tuple) -> tuple[Optional[str], Optional[str], float, Optional[tuple]]:
+    """Run one conversion, returning (content, error, seconds, parsed) instead of raising.
+
+    Module-level so it can be pickled into worker processes.
+    """
+    renderer, source, name, cached = job
+    start = time.perf_counter()
+    try:
+        frontmatter, body, parsed = read_markdown(source, cached)
+        return renderer(frontmatter, body, name), None, time.perf_counter() - start, parsed
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        return None, f"{type(e).__name__}: {e}", time.perf_counter() - start, None
+
+
+def run_conversions(
+    renderer,
+    items: list[tuple[Path, str]],
+    jobs: int,
+    cache: Optional[ParseCache] = None,
+    index: Optional[SourceIndex] = None,
+) -> list[tuple]:
+    """Convert (source, name) items, optionally in a process pool.
+
+    Results come back in input order regardless of completion order, so output
+    and logs are identical to a serial run.
+
+    Args:
+        renderer: render_agent or render_command
+        items: (source path, output name) pairs
+        jobs: Worker process count; 1 converts in-process
+        cache: Parse cache consulted before and updated after conversion
+        index: Source index providing size and mtime for cache keys
+
+    Returns:
+        List of (content, error, seconds) tuples aligned with items
+    """
+    entries = [None] * len(items)
+    cached = [None] * len(items)
+    if cache is not None and index is not None:
+        for i, (source, _) in enumerate(items):
+            entries[i] = index.lookup(source)[1]
+            if entries[i] is not None:
+                cached[i] = cache.get(entries[i])
+
+    work = [(renderer, source, name, hit) for (source, name), hit in zip(items, cached)]
+    results = _run_jobs(work, jobs)
+
+    if cache is not None:
+        for entry, hit, result in zip(entries, cached, results):
+            parsed = result[3]
+            if hit is not None and (parsed is None or parsed[2] == hit[2]):
+                STATS.cache_hit()
+            if entry is not None and parsed is not None:
+                cache.put(entry, parsed)
+    return [result[:3] for result in results]
+
+
+def _run_jobs(work: list[tuple], jobs: int) -> list[tuple]:
+    """Run _convert_job over work, in a process pool when jobs > 1."""
+    if jobs <= 1 or len(work) <= 1:
+        return [_convert_job(job) for job in work]
+
+    workers = min(jobs, len(work))
+    chunksize = max(1, len(work) // (workers * 4))
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=configure_path_rewrites,
+        initargs=(PATH_REWRITER.mapping,),
+    ) as pool:
+        return list(pool.map(_convert_job, work, chunksize=chunksize))
+
+
+def report_failures(failures: list[tuple[str, str]]) -> None:
+    """Print conversion errors collected during a phase."""
+    for name, error in failures:
+        print(f"  Failed: {name} ({error})", file=sys.stderr)
+
+
+BACKUPS_DIR_NAME = ".opencode.backups"
+DEFAULT_BACKUP_KEEP = 5
+
+
+def clone_file(src: Path, dst: Path) -> None:
+    """Copy a file with its metadata, letting the kernel share extents if it can.
+
+    Uses kernel_copy, so copy-on-write filesystems (btrfs, XFS) reflink the
+    data instead of duplicating it. Falls back to shutil.copy2 on errors.
+    """
+    try:
+        kernel_copy(src, dst)
+        shutil.copystat(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def list_snapshots(backups_dir: Path) -> list[Path]:
+    """Completed snapshots, oldest first (names are sortable timestamps)."""
+    if not backups_dir.is_dir():
+        return []
+    return sorted(
+        p for p in backups_dir.iterdir() if p.is_dir() and not p.name.startswith(".")
+    )
+
+
+def backup_opencode_dir(opencode_dir: Path, keep: int = DEFAULT_BACKUP_KEEP) -> Optional[Path]:
+    """Snapshot the .opencode directory before overwriting.
+
+    Snapshots live in .opencode.backups/<timestamp>/. Files whose size and
+    mtime match the previous snapshot are hardlinked to it instead of copied,
+    so a snapshot costs O(changed files) in time and disk space. This is safe
+    because generated outputs are always replaced atomically, never modified in
+    place, and snapshot files are never written to. Only the newest `keep`
+    snapshots are retained. Symlinks pointing outside .opencode (--link-mode
+    symlink) are snapshotted as copies of their targets.
 
     Args:
         opencode_dir: Path to .opencode directory
+        keep: Number of snapshots to retain (0 disables backups)
 
     Returns:
-        Path to backup directory if created, None otherwise
+        Path to the new snapshot if created, None otherwise
     """
-    if not opencode_dir.exists():
+    if keep <= 0 or not opencode_dir.exists():
         return None
 
-    backup_dir = opencode_dir.parent / ".opencode.backup"
+    backups_dir = opencode_dir.parent / BACKUPS_DIR_NAME
+    backups_dir.mkdir(exist_ok=True)
+    snapshots = list_snapshots(backups_dir)
+    previous = snapshots[-1] if snapshots else None
+
+    name = datetime.now().strftime("%Y%m%d-%H%M%S")
+    suffix = 0
+    while (backups_dir / name).exists():
+        suffix += 1
+        name = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{suffix:03d}"
+    snapshot_dir = backups_dir / name
+    # Build under a hidden name so an interrupted backup is never used as a
+    # base. Runs hold the .opencode lock, so any partial left over belongs to
+    # an interrupted run (usually one started in an earlier second): drop them all
+    for leftover in backups_dir.glob(".*.partial"):
+        shutil.rmtree(leftover, ignore_errors=True)
+    partial_dir = backups_dir / f".{name}.partial"
+
+    linked = copied = 0
+    real_root = os.path.realpath(opencode_dir)
+    for dirpath, dirnames, filenames in os.walk(opencode_dir):
+        rel_dir = Path(dirpath).relative_to(opencode_dir)
+        if rel_dir == Path("."):
+            # The parse cache is rebuilt on demand and not worth snapshotting
+            dirnames[:] = [d for d in dirnames if d != CACHE_DIR_NAME]
+            filenames = [f for f in filenames if f not in (LOCK_NAME, QUEUE_LOCK_NAME)]
+        target_dir = partial_dir / rel_dir
+        target_dir.mkdir(parents=True, exist_ok=True)
+        for filename in filenames + [d for d in dirnames if os.path.islink(os.path.join(dirpath, d))]:
+            src = Path(dirpath) / filename
+            dst = target_dir / filename
+            if src.is_symlink():
+                target = os.path.realpath(src)
+                # Links within .opencode keep working inside the snapshot; links
+                # out of it (--link-mode symlink) are relative to a tree one
+                # level shallower and would dangle, so snapshot what they point to
+                if os.path.commonpath([real_root, target]) == real_root or not os.path.exists(target):
+                    os.symlink(os.readlink(src), dst)
+                    continue
+                if os.path.isdir(target):
+                    shutil.copytree(target, dst, symlinks=True, copy_function=shutil.copy2)
+                    copied += 1
+                    continue
+            if previous is not None:
+                base = previous / rel_dir / filename
+                try:
+                    st, base_st = src.stat(), base.lstat()
+                    if (st.st_size, st.st_mtime_ns) == (base_st.st_size, base_st.st_mtime_ns):
+                        os.link(base, dst)
+                        linked += 1
+                        continue
+                except OSError:
+                    pass  # No base file, or hardlinks unsupported: copy instead
+            clone_file(src, dst)
+            copied += 1
+        # Symlinked directories were recorded as links or copies above, don't descend
+        dirnames[:] = [d for d in dirnames if not os.path.islink(os.path.join(dirpath, d))]
 
-    # Remove old backup if exists
-    if backup_dir.exists():
-        shutil.rmtree(backup_dir)
+    os.replace(partial_dir, snapshot_dir)
+    print(f"  Backed up .opencode to {snapshot_dir} ({copied} copied, {linked} linked)")
 
-    # Create new backup
-    shutil.copytree(opencode_dir, backup_dir)
-    print(f"  Backed up .opencode to {backup_dir}")
+    # Rotate: drop the oldest snapshots beyond the retention count
+    for old in list_snapshots(backups_dir)[:-keep]:
+        shutil.rmtree(old)
 
-    return backup_dir
+    return snapshot_dir
 
 
 def generate_agents_md(project_root: Path) -> str:
@@ -544,7 +2417,12 @@ PLUGIN_PACKAGE_JSON = '''{
 
 
 def generate_opencode_plugins(
-    project_root: Path, claude_dir: Path, opencode_dir: Path, args
+    project_root: Path,
+    claude_dir: Path,
+    opencode_dir: Path,
+    args,
+    manifest: Manifest,
+    index: SourceIndex,
 ) -> None:
     """Generate OpenCode TypeScript plugins from Claude hooks."""
     plugin_dir = opencode_dir / "plugin"
@@ -552,7 +2430,7 @@ def generate_opencode_plugins(
 
     # Check if hooks/lib exists
     hooks_lib_dir = claude_dir / "hooks" / "lib"
-    if not hooks_lib_dir.exists():
+    if not index.is_dir("hooks/lib"):
         if args.verbose:
             print("\nSkipped plugins: .claude/hooks/lib/ not found")
         return
@@ -578,45 +2456,44 @@ def generate_opencode_plugins(
     copied_libs = 0
     for lib_file in lib_files:
         src = hooks_lib_dir / lib_file
-        if src.exists():
+        if index.is_file(f"hooks/lib/{lib_file}"):
             dst = lib_dir / lib_file
-            if not dst.exists() or args.force:
+            if needs_generation(dst, [src], manifest, args):
                 if args.dry_run:
                     print(f"  [DRY-RUN] Would copy lib: {lib_file}")
                 else:
-                    shutil.copy2(src, dst)
-                    # Replace .claude/ paths with .opencode/ in lib file
-                    replace_claude_paths_in_file(dst)
+                    # Replace .claude/ paths with .opencode/ while copying
+                    copy_file_with_rewrite(src, dst)
+                    manifest.record(dst, [src])
                     if args.verbose:
                         print(f"  Copied lib: {lib_file}")
                 copied_libs += 1
 
     # 2. Copy scout-block/ modules to plugin/scout-block/ (sibling to lib/)
     # This matches the relative import path in scout-checker.cjs: '../scout-block/'
-    scout_block_dir = claude_dir / "hooks" / "scout-block"
     scout_dst_dir = plugin_dir / "scout-block"
-    if scout_block_dir.exists():
-        if not scout_dst_dir.exists() or args.force:
+    if index.is_dir("hooks/scout-block"):
+        scout_sources = [e.path for e in index.files("hooks/scout-block", recursive=True)]
+        if needs_generation(scout_dst_dir, scout_sources, manifest, args):
             if args.dry_run:
                 print(f"  [DRY-RUN] Would copy scout-block/ modules")
             else:
-                if scout_dst_dir.exists():
-                    shutil.rmtree(scout_dst_dir)
-                shutil.copytree(scout_block_dir, scout_dst_dir)
-                # Replace .claude/ paths with .opencode/ in scout-block files
-                replace_claude_paths_in_dir(scout_dst_dir)
+                # Replace .claude/ paths with .opencode/ while copying
+                copy_tree_with_rewrite(index, "hooks/scout-block", scout_dst_dir)
+                manifest.record(scout_dst_dir, scout_sources)
                 if args.verbose:
                     print(f"  Copied scout-block/ modules")
 
     # 3. Copy .ckignore to .opencode/
     ckignore_src = claude_dir / ".ckignore"
     ckignore_dst = opencode_dir / ".ckignore"
-    if ckignore_src.exists():
-        if not ckignore_dst.exists() or args.force:
+    if index.is_file(".ckignore"):
+        if needs_generation(ckignore_dst, [ckignore_src], manifest, args):
             if args.dry_run:
                 print(f"  [DRY-RUN] Would copy .ckignore")
             else:
-                shutil.copy2(ckignore_src, ckignore_dst)
+                copy_file_with_rewrite(ckignore_src, ckignore_dst, rewrite=False)
+                manifest.record(ckignore_dst, [ckignore_src])
                 if args.verbose:
                     print(f"  Copied .ckignore")
 
@@ -632,32 +2509,371 @@ def generate_opencode_plugins(
     generated_plugins = 0
     for filename, template in plugin_templates.items():
         output_path = plugin_dir / filename
-        if not output_path.exists() or args.force:
+        template_hash = hash_text(template)
+        if needs_generation(output_path, [], manifest, args, salt=template_hash):
             if args.dry_run:
                 print(f"  [DRY-RUN] Would generate: {filename}")
             else:
-                output_path.write_text(template, encoding="utf-8")
+                write_if_changed(output_path, template)
+                manifest.record(output_path, [], salt=template_hash)
                 if args.verbose:
                     print(f"  Generated: {filename}")
             generated_plugins += 1
         else:
             if args.verbose:
-                print(f"  Skipped (exists): {filename}")
+                print(f"  Skipped (up to date): {filename}")
 
     # 5. Generate package.json in .opencode/ (not plugin/)
     # OpenCode looks for dependencies in .opencode/package.json
     pkg_path = opencode_dir / "package.json"
-    if not pkg_path.exists() or args.force:
+    pkg_hash = hash_text(PLUGIN_PACKAGE_JSON)
+    if needs_generation(pkg_path, [], manifest, args, salt=pkg_hash):
         if args.dry_run:
             print(f"  [DRY-RUN] Would generate: .opencode/package.json")
         else:
-            pkg_path.write_text(PLUGIN_PACKAGE_JSON, encoding="utf-8")
+            write_if_changed(pkg_path, PLUGIN_PACKAGE_JSON)
+            manifest.record(pkg_path, [], salt=pkg_hash)
             if args.verbose:
                 print(f"  Generated: .opencode/package.json")
 
     print(f"  Generated {generated_plugins} plugins, copied {copied_libs} lib modules")
 
 
+# ═══════════════════════════════════════════════════════════════════════════
+# RUN LOCK
+# ═══════════════════════════════════════════════════════════════════════════
+
+LOCK_NAME = ".lock"
+# Held by the one run waiting for LOCK_NAME; later runs coalesce into it
+QUEUE_LOCK_NAME = ".lock.queue"
+LOCK_POLICIES = ("wait", "skip")
+LOCK_POLL_INTERVAL = 0.1
+
+
+def _try_lock(fd: int, blocking: bool = False) -> bool:
+    """Take an exclusive advisory lock on fd.
+
+    Returns:
+        False if another process holds it; True once taken, or when the
+        platform or filesystem has no usable locking (runs are then unguarded)
+    """
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        elif msvcrt is not None:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError as e:
+        if e.errno in (errno.EAGAIN, errno.EACCES, errno.EDEADLK):
+            return False
+    return True
+
+
+def _release_lock(fd: int) -> None:
+    if fcntl is None and msvcrt is not None:
+        try:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        except OSError:
+            pass
+    os.close(fd)
+
+
+class RunLock:
+    """Cross-process lock serialising generator runs on one .opencode directory.
+
+    The lock is an flock on .opencode/.lock (msvcrt byte lock on Windows),
+    released by the kernel if the holder dies, so a killed run never leaves it
+    stuck. A run that finds it held either skips or waits. Only one run waits
+    at a time: it holds .opencode/.lock.queue while waiting and lets go of it
+    once it owns the main lock, before indexing .claude/. A run that finds the
+    queue slot taken therefore knows the waiter has not looked at the sources
+    yet, and exits instead of queuing a duplicate pass.
+
+    Lock files are never deleted; unlinking a file others may be blocked on
+    would let two runs lock different inodes.
+    """
+
+    ACQUIRED = "acquired"
+    BUSY = "busy"
+    COALESCED = "coalesced"
+    TIMED_OUT = "timed out"
+
+    def __init__(self, opencode_dir: Path):
+        self.path = opencode_dir / LOCK_NAME
+        self.queue_path = opencode_dir / QUEUE_LOCK_NAME
+        self.fd: Optional[int] = None
+        # Set when another run had to finish first (its index is then stale)
+        self.waited = False
+
+    def _open(self, path: Path) -> int:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+
+    def holder(self) -> str:
+        """PID recorded by the current holder, or "" if unknown."""
+        try:
+            return self.path.read_text(encoding="ascii").strip()
+        except (OSError, ValueError):
+            return ""
+
+    def acquire(self, policy: str = "wait", timeout: float = 0, coalesce: bool = True) -> str:
+        """Take the lock according to policy.
+
+        Args:
+            policy: "wait" for the current holder, or "skip" the run if held
+            timeout: Seconds to wait before giving up (0 waits indefinitely)
+            coalesce: Hand this run's work to an already queued run instead of
+                waiting too (off for --force, whose pass must happen)
+
+        Returns:
+            ACQUIRED, or why the run should not go ahead: BUSY (skip policy),
+            COALESCED (a queued run will cover it) or TIMED_OUT
+        """
+        fd = self._open(self.path)
+        if not _try_lock(fd):
+            outcome = self._wait(fd, policy, timeout, coalesce)
+            if outcome != self.ACQUIRED:
+                os.close(fd)
+                return outcome
+        self.fd = fd
+        try:
+            os.ftruncate(fd, 0)
+            os.write(fd, f"{os.getpid()}\n".encode("ascii"))
+        except OSError:
+            pass  # The PID is only informational
+        return self.ACQUIRED
+
+    def _wait(self, fd: int, policy: str, timeout: float, coalesce: bool) -> str:
+        holder = self.holder()
+        holder = f" (pid {holder})" if holder else ""
+        if policy == "skip":
+            print(f"Another generator run{holder} holds {self.path}, skipping")
+            return self.BUSY
+
+        queue_fd = self._open(self.queue_path)
+        if not _try_lock(queue_fd):
+            _release_lock(queue_fd)
+            queue_fd = None
+            if coalesce:
+                print(f"Another generator run is already queued behind the current one{holder}; "
+                      f"it will pick up these changes")
+                return self.COALESCED
+
+        print(f"Waiting for another generator run{holder} to finish...")
+        self.waited = True
+        try:
+            if timeout <= 0 and fcntl is not None:
+                acquired = _try_lock(fd, blocking=True)
+            else:
+                deadline = time.monotonic() + timeout if timeout > 0 else None
+                acquired = _try_lock(fd)
+                while not acquired and (deadline is None or time.monotonic() < deadline):
+                    time.sleep(LOCK_POLL_INTERVAL)
+                    acquired = _try_lock(fd)
+        finally:
+            if queue_fd is not None:
+                _release_lock(queue_fd)
+        if not acquired:
+            print(f"Gave up waiting for {self.path} after {timeout:g}s", file=sys.stderr)
+            return self.TIMED_OUT
+        return self.ACQUIRED
+
+    def release(self) -> None:
+        if self.fd is not None:
+            _release_lock(self.fd)
+            self.fd = None
+
+
+def generate_locked(
+    project_root: Path, args, index: Optional[SourceIndex] = None, summary: bool = True
+) -> Optional[int]:
+    """Run generate() while holding the .opencode run lock.
+
+    --dry-run passes write nothing and run without the lock.
+
+    Returns:
+        generate()'s exit code, 1 if the lock wait timed out, or None if the
+        pass was skipped or coalesced into a queued run
+    """
+    if args.dry_run:
+        return generate(project_root, args, index, summary)
+
+    lock = RunLock(project_root / ".opencode")
+    outcome = lock.acquire(args.lock, args.lock_timeout, coalesce=not args.force)
+    if outcome == RunLock.TIMED_OUT:
+        return 1
+    if outcome != RunLock.ACQUIRED:
+        return None
+    try:
+        # Whatever the previous holder changed, and any source edits made
+        # while waiting, are only visible to a fresh index
+        return generate(project_root, args, None if lock.waited else index, summary)
+    finally:
+        lock.release()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# WATCH MODE
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Source locations whose changes trigger regeneration, relative to .claude/
+WATCH_PATHS = (
+    "agents",
+    "commands",
+    "skills",
+    "workflows",
+    "scripts",
+    "hooks/lib",
+    "hooks/scout-block",
+    ".ckignore",
+    ".env.example",
+)
+DEFAULT_WATCH_INTERVAL = 1.0
+DEFAULT_DEBOUNCE = 0.3
+
+
+def watch_signature(index: SourceIndex) -> dict[str, tuple]:
+    """Snapshot of (kind, size, mtime_ns, inode) for every watched source entry."""
+    signature = {}
+    for rel, entry in index.entries.items():
+        if any(rel == p or rel.startswith(p + "/") for p in WATCH_PATHS):
+            signature[rel] = (entry.is_dir, entry.size, entry.mtime_ns, entry.inode)
+    return signature
+
+
+class InotifyWaker:
+    """Block until something changes in a set of directories (Linux only).
+
+    Uses inotify through ctypes, so no third-party dependency is needed. It only
+    tells the watch loop when to look; what changed is still worked out by
+    diffing the source index, which keeps polling and inotify behaviour equal.
+    """
+
+    # IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    # | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+    MASK = 0x002 | 0x004 | 0x008 | 0x040 | 0x080 | 0x100 | 0x200 | 0x400 | 0x800
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watched: set[str] = set()
+
+    @classmethod
+    def create(cls) -> Optional["InotifyWaker"]:
+        """Return a waker, or None where inotify is unavailable."""
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            return cls()
+        except (OSError, AttributeError):
+            return None
+
+    def watch(self, index: SourceIndex) -> None:
+        """Add watches for .claude/ and every watched directory not yet covered."""
+        paths = [index.root] + [
+            e.path for rel, e in index.entries.items()
+            if e.is_dir and any(rel == p or rel.startswith(p + "/") for p in WATCH_PATHS)
+        ]
+        for path in paths:
+            key = str(path)
+            if key not in self.watched:
+                # A failure (e.g. watch limit reached) just falls back to the poll timeout
+                if self.libc.inotify_add_watch(self.fd, os.fsencode(key), self.MASK) >= 0:
+                    self.watched.add(key)
+
+    def wait(self, timeout: float) -> None:
+        """Sleep until an event arrives or timeout elapses, then drain the queue."""
+        import select
+
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if ready:
+            try:
+                while os.read(self.fd, 65536):
+                    pass
+            except BlockingIOError:
+                pass
+        # Watches on removed directories are dropped by the kernel; re-add lazily
+        self.watched = {p for p in self.watched if os.path.isdir(p)}
+
+    def close(self) -> None:
+        """Release the inotify descriptor (and with it every watch)."""
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+        self.watched.clear()
+
+
+def watch(project_root: Path, args) -> int:
+    """Keep .opencode in sync with .claude until interrupted.
+
+    Runs one full pass, then re-indexes .claude/ every --watch-interval seconds
+    (or as soon as inotify reports activity) and regenerates after changes have
+    settled for --debounce seconds. Each pass reuses the manifest, so only the
+    entries whose sources changed are converted again; --force only applies to
+    the first pass.
+    """
+    claude_dir = project_root / ".claude"
+    waker = InotifyWaker.create()
+    try:
+        return _watch_loop(project_root, claude_dir, args, waker)
+    finally:
+        if waker:
+            waker.close()
+
+
+def _watch_loop(project_root: Path, claude_dir: Path, args, waker: Optional[InotifyWaker]) -> int:
+    """Body of watch(): first pass, then regenerate on every settled change."""
+    index = SourceIndex.build(claude_dir)
+    status = generate_locked(project_root, args, index) or 0
+    args.force = False
+    signature = watch_signature(index)
+
+    mode = "inotify" if waker else f"polling every {args.watch_interval}s"
+    print(f"\nWatching {claude_dir} for changes ({mode}). Press Ctrl+C to stop.")
+    try:
+        while True:
+            if waker:
+                waker.watch(index)
+                waker.wait(args.watch_interval)
+            else:
+                time.sleep(args.watch_interval)
+
+            index = SourceIndex.build(claude_dir)
+            current = watch_signature(index)
+            if current == signature:
+                continue
+
+            # Debounce: wait until a burst of saves has settled
+            while True:
+                time.sleep(args.debounce)
+                index = SourceIndex.build(claude_dir)
+                settled = watch_signature(index)
+                if settled == current:
+                    break
+                current = settled
+
+            changed = {k for k in current.keys() | signature.keys() if current.get(k) != signature.get(k)}
+            print(f"\n[{datetime.now().strftime('%H:%M:%S')}] {len(changed)} change(s) detected, regenerating...")
+            result = generate_locked(project_root, args, index, summary=False)
+            if result is None:
+                continue  # Another run had the lock; retry on the next tick
+            status = result
+            signature = current
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+    return status
+
+
+DEFAULT_PROFILE_PREFIX = "generate-opencode-profile"
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Generate OpenCode configuration from Claude Code setup"
@@ -665,19 +2881,143 @@ def main():
     parser.add_argument("--force", action="store_true", help="Overwrite existing files")
     parser.add_argument("--dry-run", action="store_true", help="Show what would be created")
     parser.add_argument("--verbose", action="store_true", help="Show detailed output")
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=1, metavar="N",
+        help="Worker processes for agent/command conversion (0 = all CPUs, default: 1)"
+    )
+    parser.add_argument(
+        "--backup-keep", type=int, default=DEFAULT_BACKUP_KEEP, metavar="N",
+        help=f"Snapshots of .opencode kept in {BACKUPS_DIR_NAME}/ on --force "
+             f"(default: {DEFAULT_BACKUP_KEEP}, 0 disables backups)"
+    )
+    parser.add_argument(
+        "--stats", nargs="?", const="", metavar="PATH",
+        help="Print per-phase timing and I/O; with PATH also write them as JSON"
+    )
+    parser.add_argument(
+        "--profile", nargs="?", const="", metavar="PREFIX",
+        help=f"Profile the run; writes PREFIX.pstats and PREFIX.collapsed.txt "
+             f"(default prefix: {DEFAULT_PROFILE_PREFIX})"
+    )
+    parser.add_argument(
+        "--profile-memory", action="store_true",
+        help="With --profile, also record tracemalloc peak memory per phase"
+    )
+    parser.add_argument(
+        "--watch", action="store_true",
+        help="Keep running and regenerate outputs whenever .claude/ sources change"
+    )
+    parser.add_argument(
+        "--watch-interval", type=float, default=DEFAULT_WATCH_INTERVAL, metavar="SECONDS",
+        help=f"Polling interval for --watch (default: {DEFAULT_WATCH_INTERVAL})"
+    )
+    parser.add_argument(
+        "--debounce", type=float, default=DEFAULT_DEBOUNCE, metavar="SECONDS",
+        help=f"Quiet period after the last change before regenerating (default: {DEFAULT_DEBOUNCE})"
+    )
+    parser.add_argument(
+        "--no-prune", action="store_true",
+        help="Keep outputs whose source was deleted or renamed in .claude/"
+    )
+    parser.add_argument(
+        "--lock", choices=LOCK_POLICIES, default="wait",
+        help=f"When another run holds .opencode/{LOCK_NAME}: wait for it (coalescing "
+             f"with an already queued run) or skip this run (default: wait)"
+    )
+    parser.add_argument(
+        "--lock-timeout", type=float, default=0, metavar="SECONDS",
+        help="Give up waiting for the lock after SECONDS (default: 0, wait indefinitely)"
+    )
+    parser.add_argument(
+        "--link-mode", choices=LINK_MODES, default="copy",
+        help="How files that need no path rewriting are placed in .opencode: "
+             "copied (reflinked where supported), hardlinked or symlinked (default: copy)"
+    )
+    parser.add_argument(
+        "--parse-cache-mb", type=int, default=DEFAULT_PARSE_CACHE_MB, metavar="MB",
+        help=f"Size cap of the frontmatter parse cache in .opencode/{CACHE_DIR_NAME}/ "
+             f"(default: {DEFAULT_PARSE_CACHE_MB}, 0 disables it)"
+    )
+    parser.add_argument(
+        "--rewrite", action="append", default=[], metavar="FROM=TO",
+        help="Extra path rewrite applied with .claude/ -> .opencode/ (repeatable), "
+             "e.g. --rewrite CLAUDE.md=AGENTS.md"
+    )
     args = parser.parse_args()
+    if args.jobs <= 0:
+        args.jobs = os.cpu_count() or 1
+
+    extra_rewrites = {}
+    for mapping in args.rewrite:
+        old, sep, new = mapping.partition("=")
+        if not sep or not old:
+            parser.error(f"--rewrite expects FROM=TO, got: {mapping}")
+        extra_rewrites[old] = new
+    configure_path_rewrites(extra_rewrites)
+    global LINK_MODE
+    LINK_MODE = args.link_mode
+    if args.watch and args.dry_run:
+        parser.error("--watch cannot be combined with --dry-run")
+    if args.profile_memory and args.profile is None:
+        parser.error("--profile-memory requires --profile")
 
     project_root = find_project_root()
-    opencode_dir = project_root / ".opencode"
-    claude_dir = project_root / ".claude"
 
     print(f"Project root: {project_root}")
-    print(f"OpenCode dir: {opencode_dir}")
+    print(f"OpenCode dir: {project_root / '.opencode'}")
     print()
 
+    def run() -> int:
+        if args.watch:
+            return watch(project_root, args)
+        return generate_locked(project_root, args) or 0
+
+    if args.profile is None:
+        return run()
+
+    try:
+        from profile_utils import MemoryPhases, run_profiled
+    except ImportError:
+        parser.error("--profile requires profile_utils.py next to this script")
+    memory = MemoryPhases() if args.profile_memory else None
+    if memory is not None:
+        STATS.phase_hook = memory.begin
+    return run_profiled(run, args.profile or DEFAULT_PROFILE_PREFIX, memory)
+
+
+def generate(
+    project_root: Path, args, index: Optional[SourceIndex] = None, summary: bool = True
+) -> int:
+    """Run one generation pass over all phases.
+
+    Args:
+        project_root: Project containing .claude/
+        args: Parsed command line options
+        index: Prebuilt index of .claude/ (built here if not given)
+        summary: Print the closing summary
+
+    Returns:
+        Process exit code (1 if any file failed to convert)
+    """
+    opencode_dir = project_root / ".opencode"
+    claude_dir = project_root / ".claude"
+    failures = []
+    STATS.reset()
+
     # Backup existing .opencode directory if --force is used
     if args.force and not args.dry_run:
-        backup_opencode_dir(opencode_dir)
+        STATS.begin("backup")
+        backup_opencode_dir(opencode_dir, args.backup_keep)
+
+    STATS.begin("index")
+    if index is None:
+        index = SourceIndex.build(claude_dir)
+    manifest = Manifest.load(opencode_dir, project_root, index, generation_config())
+    if manifest.resumed or manifest.in_flight:
+        print(
+            f"Resuming interrupted run: {len(manifest.resumed)} outputs already done, "
+            f"{len(manifest.in_flight)} to verify"
+        )
 
     # Create directories
     dirs_to_create = [
@@ -697,8 +3037,10 @@ def main():
                     print(f"Created directory: {dir_path}")
 
     # Generate AGENTS.md
+    STATS.begin("agents_md")
     agents_md_path = project_root / "AGENTS.md"
-    if not agents_md_path.exists() or args.force:
+    agents_md_sources = [project_root / "README.md", project_root / "CLAUDE.md"]
+    if needs_generation(agents_md_path, agents_md_sources, manifest, args):
         agents_md_content = generate_agents_md(project_root)
         if args.dry_run:
             print(f"[DRY-RUN] Would create: {agents_md_path}")
@@ -706,58 +3048,75 @@ def main():
                 print("--- AGENTS.md preview ---")
                 print(agents_md_content[:500] + "...")
         else:
-            with open(agents_md_path, "w", encoding="utf-8") as f:
-                f.write(agents_md_content)
-            print(f"Created: {agents_md_path}")
+            existed = agents_md_path.exists()
+            written = write_if_changed(agents_md_path, agents_md_content)
+            manifest.record(agents_md_path, agents_md_sources)
+            action = "Unchanged" if not written else "Updated" if existed else "Created"
+            print(f"{action}: {agents_md_path}")
+    elif manifest.key(agents_md_path) in manifest.entries:
+        print(f"Skipped (up to date): {agents_md_path}")
     else:
         print(f"Skipped (exists): {agents_md_path}")
 
     # Note: opencode.json is not generated - users configure it manually
     # OpenCode will use defaults if no config file exists
 
+    parse_cache = None
+    if not args.dry_run:
+        parse_cache = ParseCache.open(opencode_dir, args.parse_cache_mb * 1024 * 1024)
+
     # Convert Claude Code agents to OpenCode agents
-    claude_agents_dir = claude_dir / "agents"
-    if claude_agents_dir.exists():
+    STATS.begin("agents")
+    if index.is_dir("agents"):
         print("\nConverting agents...")
-        for agent_file in claude_agents_dir.glob("*.md"):
+        agent_entries = index.files("agents", ".md")
+        pending = []
+        for entry in agent_entries:
+            agent_file = entry.path
             agent_name = agent_file.stem
             output_path = opencode_dir / "agents" / f"{agent_name}.md"
 
-            if output_path.exists() and not args.force:
+            if not needs_generation(output_path, [agent_file], manifest, args):
                 if args.verbose:
-                    print(f"  Skipped (exists): {agent_name}")
+                    print(f"  Skipped (up to date): {agent_name}")
+                continue
+            pending.append((agent_file, agent_name))
+
+        results = run_conversions(render_agent, pending, args.jobs, parse_cache, index)
+        agent_failures = []
+        for (agent_file, agent_name), (output_content, error, seconds) in zip(pending, results):
+            STATS.read(index.lookup(agent_file)[1].size)
+            STATS.file_time(agent_file, seconds)
+            if error:
+                agent_failures.append((agent_name, error))
                 continue
 
-            with open(agent_file, "r", encoding="utf-8") as f:
-                content = f.read()
-
-            frontmatter, body = parse_yaml_frontmatter(content)
-            opencode_fm, opencode_body = convert_claude_agent_to_opencode(
-                frontmatter, body, agent_name
-            )
-
-            output_content = generate_yaml_frontmatter(opencode_fm) + "\n\n" + opencode_body
-
+            output_path = opencode_dir / "agents" / f"{agent_name}.md"
             if args.dry_run:
                 print(f"  [DRY-RUN] Would convert: {agent_name}")
             else:
-                with open(output_path, "w", encoding="utf-8") as f:
-                    f.write(output_content)
+                write_if_changed(output_path, output_content)
+                manifest.record(output_path, [agent_file])
                 if args.verbose:
                     print(f"  Converted: {agent_name}")
 
-        print(f"  Converted {len(list(claude_agents_dir.glob('*.md')))} agents")
+        report_failures(agent_failures)
+        failures.extend(agent_failures)
+        print(f"  Converted {len(agent_entries)} agents")
 
     # Convert Claude Code commands to OpenCode commands
     # OpenCode doesn't support multi-level commands, so flatten with "-" separators
     # e.g., bootstrap/auto/fast.md → bootstrap-auto-fast.md
+    STATS.begin("commands")
     claude_commands_dir = claude_dir / "commands"
-    if claude_commands_dir.exists():
+    if index.is_dir("commands"):
         print("\nConverting commands...")
         converted_count = 0
+        pending = []
 
-        # Use rglob to find all .md files including nested directories
-        for cmd_file in claude_commands_dir.rglob("*.md"):
+        # Find all .md files including nested directories
+        for entry in index.files("commands", ".md", recursive=True):
+            cmd_file = entry.path
             # Get relative path from commands dir and flatten with dashes
             rel_path = cmd_file.relative_to(claude_commands_dir)
             # Convert path parts to flattened name: bootstrap/auto/fast.md → bootstrap-auto-fast
@@ -768,65 +3127,68 @@ def main():
             cmd_name = "-".join(path_parts) if len(path_parts) > 1 else path_parts[0]
             output_path = opencode_dir / "commands" / f"{cmd_name}.md"
 
-            if output_path.exists() and not args.force:
+            if not needs_generation(output_path, [cmd_file], manifest, args):
                 if args.verbose:
-                    print(f"  Skipped (exists): {cmd_name}")
+                    print(f"  Skipped (up to date): {cmd_name}")
+                continue
+            pending.append((cmd_file, cmd_name))
+
+        results = run_conversions(render_command, pending, args.jobs, parse_cache, index)
+        command_failures = []
+        for (cmd_file, cmd_name), (output_content, error, seconds) in zip(pending, results):
+            STATS.read(index.lookup(cmd_file)[1].size)
+            STATS.file_time(cmd_file, seconds)
+            if error:
+                command_failures.append((cmd_name, error))
                 continue
 
-            with open(cmd_file, "r", encoding="utf-8") as f:
-                content = f.read()
-
-            frontmatter, body = parse_yaml_frontmatter(content)
-            opencode_fm, opencode_body = convert_claude_command_to_opencode(
-                frontmatter, body, cmd_name
-            )
-
-            output_content = generate_yaml_frontmatter(opencode_fm) + "\n\n" + opencode_body
-
+            output_path = opencode_dir / "commands" / f"{cmd_name}.md"
             if args.dry_run:
                 print(f"  [DRY-RUN] Would convert: {cmd_name}")
             else:
-                with open(output_path, "w", encoding="utf-8") as f:
-                    f.write(output_content)
+                write_if_changed(output_path, output_content)
+                manifest.record(output_path, [cmd_file])
                 if args.verbose:
                     print(f"  Converted: {cmd_name}")
             converted_count += 1
 
+        report_failures(command_failures)
+        failures.extend(command_failures)
         print(f"  Converted {converted_count} commands")
 
     # Copy skills from .claude/skills/ to .opencode/skills/
-    claude_skills_dir = claude_dir / "skills"
+    STATS.begin("skills")
     opencode_skills_dir = opencode_dir / "skills"
-    if claude_skills_dir.exists():
+    if index.is_dir("skills"):
         print("\nCopying skills...")
         skill_count = 0
-        for skill_dir in claude_skills_dir.iterdir():
-            if skill_dir.is_dir() and (skill_dir / "SKILL.md").exists():
+        for skill_entry in index.listdir("skills"):
+            if skill_entry.is_dir and index.is_file(f"{skill_entry.rel}/SKILL.md"):
+                skill_dir = skill_entry.path
                 skill_name = skill_dir.name
                 target_dir = opencode_skills_dir / skill_name
+                skill_sources = [e.path for e in index.files(skill_entry.rel, recursive=True)]
 
-                if target_dir.exists() and not args.force:
+                if not needs_generation(target_dir, skill_sources, manifest, args):
                     if args.verbose:
-                        print(f"  Skipped (exists): {skill_name}")
+                        print(f"  Skipped (up to date): {skill_name}")
                     continue
 
                 if args.dry_run:
                     print(f"  [DRY-RUN] Would copy skill: {skill_name}")
                 else:
-                    if target_dir.exists():
-                        shutil.rmtree(target_dir)
-                    shutil.copytree(skill_dir, target_dir)
-                    # Replace .claude/ paths with .opencode/ in skill markdown files
-                    replace_claude_paths_in_dir(target_dir)
+                    # Replace .claude/ paths with .opencode/ while copying
+                    copy_tree_with_rewrite(index, skill_entry.rel, target_dir)
+                    manifest.record(target_dir, skill_sources)
                     if args.verbose:
                         print(f"  Copied: {skill_name}")
                 skill_count += 1
         print(f"  Copied {skill_count} skills")
 
     # Copy workflows from .claude/workflows/ to .opencode/workflow/
-    claude_workflows_dir = claude_dir / "workflows"
+    STATS.begin("workflows")
     opencode_workflows_dir = opencode_dir / "workflows"
-    if claude_workflows_dir.exists():
+    if index.is_dir("workflows"):
         print("\nCopying workflows...")
         if not opencode_workflows_dir.exists():
             if args.dry_run:
@@ -835,62 +3197,89 @@ def main():
                 opencode_workflows_dir.mkdir(parents=True, exist_ok=True)
 
         workflow_count = 0
-        for workflow_file in claude_workflows_dir.glob("*.md"):
+        for entry in index.files("workflows", ".md"):
+            workflow_file = entry.path
             workflow_name = workflow_file.name
             target_path = opencode_workflows_dir / workflow_name
 
-            if target_path.exists() and not args.force:
+            if not needs_generation(target_path, [workflow_file], manifest, args):
                 if args.verbose:
-                    print(f"  Skipped (exists): {workflow_name}")
+                    print(f"  Skipped (up to date): {workflow_name}")
                 continue
 
             if args.dry_run:
                 print(f"  [DRY-RUN] Would copy workflow: {workflow_name}")
             else:
-                shutil.copy2(workflow_file, target_path)
-                # Replace .claude/ paths with .opencode/ in workflow file
-                replace_claude_paths_in_file(target_path)
+                # Replace .claude/ paths with .opencode/ while copying
+                copy_file_with_rewrite(workflow_file, target_path)
+                manifest.record(target_path, [workflow_file])
                 if args.verbose:
                     print(f"  Copied: {workflow_name}")
             workflow_count += 1
         print(f"  Copied {workflow_count} workflows")
 
     # Copy scripts from .claude/scripts/ to .opencode/scripts/
-    claude_scripts_dir = claude_dir / "scripts"
+    STATS.begin("scripts")
     opencode_scripts_dir = opencode_dir / "scripts"
-    if claude_scripts_dir.exists():
+    if index.is_dir("scripts"):
         print("\nCopying scripts...")
-        if opencode_scripts_dir.exists() and not args.force:
+        script_sources = [e.path for e in index.files("scripts", recursive=True)]
+        if not needs_generation(opencode_scripts_dir, script_sources, manifest, args):
             if args.verbose:
-                print(f"  Skipped (exists): scripts/")
+                print(f"  Skipped (up to date): scripts/")
         else:
             if args.dry_run:
                 print(f"  [DRY-RUN] Would copy scripts directory")
             else:
-                if opencode_scripts_dir.exists():
-                    shutil.rmtree(opencode_scripts_dir)
-                shutil.copytree(claude_scripts_dir, opencode_scripts_dir)
-                # Replace .claude/ paths with .opencode/ in script files
-                replace_claude_paths_in_dir(opencode_scripts_dir)
-                script_count = len(list(opencode_scripts_dir.glob("*")))
+                # Replace .claude/ paths with .opencode/ while copying
+                copy_tree_with_rewrite(index, "scripts", opencode_scripts_dir)
+                manifest.record(opencode_scripts_dir, script_sources)
+                script_count = len(index.listdir("scripts"))
                 print(f"  Copied {script_count} scripts")
 
     # Copy .env.example if exists
     env_example_src = claude_dir / ".env.example"
     env_example_dst = opencode_dir / ".env.example"
-    if env_example_src.exists():
-        if not env_example_dst.exists() or args.force:
+    if index.is_file(".env.example"):
+        if needs_generation(env_example_dst, [env_example_src], manifest, args):
             if args.dry_run:
                 print(f"\n[DRY-RUN] Would copy: .env.example")
             else:
-                shutil.copy2(env_example_src, env_example_dst)
+                copy_file_with_rewrite(env_example_src, env_example_dst, rewrite=False)
+                manifest.record(env_example_dst, [env_example_src])
                 print(f"\nCopied: .env.example")
         else:
             if args.verbose:
-                print(f"\nSkipped (exists): .env.example")
+                print(f"\nSkipped (up to date): .env.example")
 
     # Generate OpenCode plugins from Claude hooks
-    generate_opencode_plugins(project_root, claude_dir, opencode_dir, args)
+    STATS.begin("plugins")
+    generate_opencode_plugins(project_root, claude_dir, opencode_dir, args, manifest, index)
+
+    if not args.no_prune:
+        STATS.begin("prune")
+        prune_outputs(manifest, index, args)
+
+    STATS.begin("manifest")
+    if parse_cache is not None:
+        parse_cache.close()
+    if not args.dry_run:
+        manifest.save()
+    STATS.end()
+
+    if args.stats is not None:
+        STATS.print_summary()
+        if args.stats:
+            stats_path = Path(args.stats)
+            stats_path.parent.mkdir(parents=True, exist_ok=True)
+            stats_path.write_text(json.dumps(STATS.to_dict(), indent=2), encoding="utf-8")
+            print(f"\nStats written to {stats_path}")
+
+    if failures:
+        print(f"\n{len(failures)} file(s) failed to convert", file=sys.stderr)
+
+    if not summary:
+        return 1 if failures else 0
 
     # Summary
     print("\n" + "=" * 50)
@@ -909,6 +3298,8 @@ def main():
     print(f"  2. Run: opencode")
     print(f"  3. Use /init to regenerate AGENTS.md with AI analysis")
 
+    return 1 if failures else 0
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -3,16 +3,73 @@
 
 Outputs YAML to stdout by default for easy consumption by Claude.
 Use --output to write to a specific file instead.
+Use --incremental with --output to merge only changed entries into an existing
+catalog file, which is rewritten only when its content changes.
+Use --shard-dir DIR to write one file per category plus DIR/index.yaml (metadata,
+category titles, counts and shard paths) so consumers can load single categories.
+Use --scan <root> to read <root>/.claude/commands and skills directly instead of
+the commands_data.yaml / skills_data.yaml files produced by the scan scripts.
+Use --profile [PREFIX] to write cProfile and collapsed-stack (flamegraph) output.
+
+YAML is parsed and emitted with libyaml (CSafeLoader/CSafeDumper) when PyYAML
+was built with it, falling back to the pure-Python SafeLoader/SafeDumper. Both
+produce the same catalogs; bench_generate_catalogs.py checks this and compares
+their speed.
+
+Parsed data files are cached as pickles in __pycache__/ (like .pyc files) and
+reused while the source's size and mtime, or failing that its SHA-256, still
+match. Use --no-cache to always parse the YAML.
 """
 
 import argparse
+import bisect
+import hashlib
+import os
+import pickle
+import re
 import sys
 import yaml
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+    LIBYAML = True
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader, SafeDumper
+    LIBYAML = False
+
+
+class CatalogDumper(SafeDumper):
+    """Dumper that writes repeated objects in full instead of as &anchors.
+
+    Catalogs are dumped a section (or category) at a time, and an anchor
+    cannot be shared between separate dumps.
+    """
+
+    def ignore_aliases(self, data):
+        return True
+
+
+class PureCatalogDumper(yaml.SafeDumper):
+    """Pure-Python CatalogDumper, for text libyaml would escape."""
+
+    def ignore_aliases(self, data):
+        return True
+
 # Script directory for resolving relative paths
 SCRIPT_DIR = Path(__file__).parent
+DEFAULT_PROFILE_PREFIX = 'generate-catalogs-profile'
+DUMP_OPTIONS = {'sort_keys': False, 'allow_unicode': True, 'default_flow_style': False}
+
+# Parsed data file cache (bump CACHE_VERSION when the cached layout changes)
+CACHE_DIR = '__pycache__'
+CACHE_VERSION = 1
+USE_CACHE = True
+
+# Below this many files a process pool costs more than it saves
+PARALLEL_SCAN_MIN_FILES = 64
 
 # Windows UTF-8 compatibility (use shared utility)
 try:
@@ -30,34 +87,341 @@ def load_yaml(filename):
     path = SCRIPT_DIR / filename
     if not path.exists():
         print(f"Error: {path} not found", file=sys.stderr)
-        print(f"Hint: Run scan_skills.py or scan_commands.py first to generate data files", file=sys.stderr)
+        print(f"Hint: Run scan_skills.py or scan_commands.py first, or use --scan <root>", file=sys.stderr)
         sys.exit(1)
-    return yaml.safe_load(path.read_text(encoding='utf-8'))
+    return read_yaml(path)
+
+
+def read_yaml(path):
+    """Parse a YAML file, answering from its pickle cache while that is fresh."""
+    if not USE_CACHE:
+        return yaml.load(path.read_text(encoding='utf-8'), Loader=SafeLoader)
+
+    st = path.stat()
+    cache = cache_path(path)
+    source = None
+    try:
+        with open(cache, 'rb') as f:
+            # The header comes first, so a stale cache is rejected without
+            # unpickling the data behind it
+            header = pickle.load(f)
+            if header['version'] == CACHE_VERSION and header['size'] == st.st_size:
+                fresh = header['mtime_ns'] == st.st_mtime_ns
+                if not fresh:
+                    # Touched but maybe unchanged (checkout, copy): content decides
+                    source = path.read_bytes()
+                    fresh = hashlib.sha256(source).hexdigest() == header['sha256']
+                if fresh:
+                    data = pickle.load(f)
+                    if source is not None:
+                        write_cache(cache, st, header['sha256'], data)
+                    return data
+    except (OSError, EOFError, KeyError, TypeError, ValueError, AttributeError, pickle.UnpicklingError):
+        pass  # Missing, truncated or written by another Python: parse again
+
+    if source is None:
+        source = path.read_bytes()
+    data = yaml.load(source.decode('utf-8'), Loader=SafeLoader)
+    write_cache(cache, st, hashlib.sha256(source).hexdigest(), data)
+    return data
+
+
+def cache_path(path):
+    """Location of the parsed-data cache for a YAML file.
+
+    Caches always live in SCRIPT_DIR's cache directory, so reading a catalog
+    elsewhere (--incremental --output) leaves nothing behind next to it.
+    Files outside SCRIPT_DIR are keyed by their absolute path.
+    """
+    path = Path(path).resolve()
+    script_dir = Path(SCRIPT_DIR).resolve()
+    if path.parent == script_dir:
+        return script_dir / CACHE_DIR / f'{path.name}.pickle'
+    key = hashlib.sha256(str(path).encode('utf-8')).hexdigest()[:16]
+    return script_dir / CACHE_DIR / f'{path.name}.{key}.pickle'
+
+
+def write_cache(cache, st, digest, data):
+    """Store parsed data with the source's stamp; failures only cost a re-parse."""
+    tmp = cache.with_name(f'{cache.name}.{os.getpid()}.tmp')
+    try:
+        cache.parent.mkdir(exist_ok=True)
+        with open(tmp, 'wb') as f:
+            header = {'version': CACHE_VERSION, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': digest}
+            pickle.dump(header, f, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+
+
+def dump_yaml(data):
+    """Serialize a catalog, keeping insertion order and non-ASCII text as is.
+
+    Top-level sections are emitted one at a time, which gives the same text as
+    dumping the whole mapping. libyaml escapes characters outside the Basic
+    Multilingual Plane (the legend's emoji) where the pure-Python emitter
+    writes them literally, so a section whose output contains such an escape
+    is emitted again with the pure-Python dumper.
+    """
+    parts = []
+    for key, value in data.items():
+        text = yaml.dump({key: value}, Dumper=CatalogDumper, **DUMP_OPTIONS)
+        if LIBYAML and '\\U' in text:
+            text = yaml.dump({key: value}, Dumper=PureCatalogDumper, **DUMP_OPTIONS)
+        parts.append(text)
+    return ''.join(parts)
+
+
+def read_frontmatter(path):
+    """Parse the YAML frontmatter of a Markdown file ({} if it has none).
+
+    Values with an unquoted ': ' make the block invalid YAML but are common in
+    command files; such blocks fall back to one 'key: value' pair per line.
+    """
+    lines = path.read_text(encoding='utf-8').split('\n')
+    # Both fences are lines of exactly '---' (trailing blanks allowed), so
+    # '----' or '---foo' inside the block does not end it
+    if lines[0].rstrip() != '---':
+        return {}
+    end = next((i for i in range(1, len(lines)) if lines[i].rstrip() == '---'), None)
+    if end is None:
+        return {}
+    block = '\n'.join(lines[1:end])
+    try:
+        data = yaml.load(block, Loader=SafeLoader)
+        return data if isinstance(data, dict) else {}
+    except yaml.YAMLError:
+        pass
 
+    data = {}
+    for line in block.splitlines():
+        key, sep, value = line.partition(':')
+        if not sep or not key or key[0].isspace():
+            continue
+        try:
+            # Keep flow lists and numbers; anything that reads as a mapping
+            # is really text containing ': '
+            parsed = yaml.load(value, Loader=SafeLoader)
+        except yaml.YAMLError:
+            parsed = None
+        data[key.strip()] = value.strip() if parsed is None or isinstance(parsed, dict) else parsed
+    return data
 
-def generate_commands_yaml():
-    """Generate COMMANDS.yaml catalog."""
-    commands = load_yaml('commands_data.yaml')
 
-    # Group by category
+def has_files(path):
+    """True if directory path contains anything besides hidden entries and __pycache__."""
+    try:
+        with os.scandir(path) as entries:
+            return any(not e.name.startswith('.') and e.name != '__pycache__' for e in entries)
+    except OSError:
+        return False
+
+
+def scan_command(job):
+    """Build a commands_data.yaml record for one command file (worker entry point)."""
+    commands_dir, rel, known = job
+    meta = read_frontmatter(Path(commands_dir) / rel)
+    parts = Path(rel).with_suffix('').parts
+    return {
+        'name': '/ck:' + ':'.join(parts),
+        'path': rel,
+        'description': str(meta.get('description') or '').strip(),
+        'argument_hint': meta.get('argument-hint', meta.get('argument_hint')) or '',
+        'power_level': meta.get('power-level', meta.get('power_level', known.get('power_level', 0))),
+        'category': parts[0] if len(parts) > 1 else 'core'
+    }
+
+
+def scan_skill(job):
+    """Build a skills_data.yaml record for one skill directory (worker entry point)."""
+    skills_dir, rel, known = job
+    skill_dir = Path(skills_dir) / rel
+    meta = read_frontmatter(skill_dir / 'SKILL.md')
+    return {
+        'category': meta.get('category') or known.get('category', 'other'),
+        'description': str(meta.get('description') or '').strip(),
+        'has_references': has_files(skill_dir / 'references'),
+        'has_scripts': has_files(skill_dir / 'scripts'),
+        'name': rel,
+        'path': f'{rel}/SKILL.md'
+    }
+
+
+def claude_dir(root):
+    """The .claude directory of root, or root itself if it already is one."""
+    root = Path(root)
+    return root / '.claude' if (root / '.claude').is_dir() else root
+
+
+def known_records(filename):
+    """Records of an existing data file keyed by path, for fields the sources lack."""
+    if not (SCRIPT_DIR / filename).exists():
+        return {}
+    return {record['path']: record for record in load_yaml(filename)}
+
+
+def run_scan(worker, jobs, workers):
+    """Map worker over jobs, in a process pool when there are enough of them."""
+    if workers == 1 or len(jobs) < PARALLEL_SCAN_MIN_FILES:
+        return [worker(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(worker, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+
+def scan_commands(root, workers=0):
+    """Scan .claude/commands/**/*.md under root into commands_data.yaml records.
+
+    Command names and categories come from the path (bootstrap/auto.md is
+    /ck:bootstrap:auto in category bootstrap, top-level files are core); the
+    description, argument hint and power level from the frontmatter. A power
+    level missing there is taken from commands_data.yaml if it exists.
+
+    Args:
+        root: Project root (or its .claude directory)
+        workers: Worker processes for frontmatter parsing (0 = all CPUs)
+
+    Returns:
+        Records in path order, as in commands_data.yaml
+    """
+    commands_dir = claude_dir(root) / 'commands'
+    known = known_records('commands_data.yaml')
+    rels = sorted(p.relative_to(commands_dir) for p in commands_dir.rglob('*.md'))
+    jobs = [(str(commands_dir), rel.as_posix(), known.get(rel.as_posix(), {})) for rel in rels]
+    return run_scan(scan_command, jobs, workers or os.cpu_count() or 1)
+
+
+def scan_skills(root, workers=0):
+    """Scan .claude/skills/ under root into skills_data.yaml records.
+
+    Every directory holding a SKILL.md is a skill (nested ones such as
+    document-skills/pdf included); has_scripts and has_references reflect
+    whether its scripts/ and references/ directories have content. Skill
+    categories are curated rather than derived: a 'category' frontmatter key
+    wins, then the category recorded in skills_data.yaml, then 'other'.
+
+    Args:
+        root: Project root (or its .claude directory)
+        workers: Worker processes for frontmatter parsing (0 = all CPUs)
+
+    Returns:
+        Records in path order, as in skills_data.yaml
+    """
+    skills_dir = claude_dir(root) / 'skills'
+    known = known_records('skills_data.yaml')
+    rels = []
+    for dirpath, dirnames, filenames in os.walk(skills_dir):
+        if 'SKILL.md' in filenames:
+            rels.append(Path(dirpath).relative_to(skills_dir))
+            dirnames[:] = []  # A skill's own subdirectories are not skills
+        else:
+            dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+    rels.sort()
+    jobs = [(str(skills_dir), rel.as_posix(), known.get(f'{rel.as_posix()}/SKILL.md', {})) for rel in rels]
+    return run_scan(scan_skill, jobs, workers or os.cpu_count() or 1)
+
+
+def group_by_category(entries):
+    """Group entries by category (in order of first appearance), sorted by name."""
     categories = {}
-    for cmd in commands:
-        cat = cmd['category']
+    for entry in entries:
+        cat = entry['category']
         if cat not in categories:
             categories[cat] = []
-        categories[cat].append(cmd)
+        categories[cat].append(entry)
 
-    # Sort commands within each category
     for cat in categories:
         categories[cat] = sorted(categories[cat], key=lambda x: x['name'])
+    return categories
+
+
+def merge_groups(groups, entries):
+    """Bring a previous catalog's category groups up to date with entries.
+
+    Entries are keyed by (category, name). Only removed, added and changed
+    entries touch the groups, through binary search on the already sorted name
+    lists, so a refresh costs one pass to diff plus work proportional to the
+    change set instead of regrouping and re-sorting everything. Categories end
+    up in first-appearance order of entries, like group_by_category.
 
+    Args:
+        groups: Category -> name-sorted entries of the previous catalog (modified)
+        entries: Current records
+
+    Returns:
+        (groups, number of changes, categories whose entries changed), or None
+        if the previous groups cannot be merged into (names not unique or not
+        sorted) and must be rebuilt
+    """
+    current = {}
+    order = {}
+    for entry in entries:
+        key = (entry['category'], entry['name'])
+        if key in current:
+            return None
+        current[key] = entry
+        order.setdefault(entry['category'])
+
+    previous = {}
+    for cat, group in groups.items():
+        if not isinstance(group, list):
+            return None
+        last = None
+        for entry in group:
+            name = entry.get('name') if isinstance(entry, dict) else None
+            if not isinstance(name, str) or (last is not None and name <= last):
+                return None
+            previous[(cat, name)] = entry
+            last = name
+
+    names = {}
+
+    def names_of(cat):
+        # Name lists are only built for the categories a change touches
+        if cat not in names:
+            names[cat] = [e['name'] for e in groups.setdefault(cat, [])]
+        return names[cat]
+
+    changes = 0
+    for cat, name in previous.keys() - current.keys():
+        index = bisect.bisect_left(names_of(cat), name)
+        del names[cat][index], groups[cat][index]
+        changes += 1
+    for key, entry in current.items():
+        old = previous.get(key)
+        if old == entry:
+            continue
+        cat, name = key
+        index = bisect.bisect_left(names_of(cat), name)
+        if old is None:
+            names[cat].insert(index, name)
+            groups[cat].insert(index, entry)
+        else:
+            groups[cat][index] = entry
+        changes += 1
+
+    merged = {cat: groups[cat] for cat in order}
+    if list(merged) != list(groups):
+        changes += 1  # Categories emptied or reordered
+    return merged, changes, set(names)
+
+
+def generate_commands_yaml(commands=None):
+    """Generate COMMANDS.yaml catalog from scanned records, or commands_data.yaml."""
+    if commands is None:
+        commands = load_yaml('commands_data.yaml')
+    return dump_yaml(commands_catalog(group_by_category(commands)))
+
+
+def commands_catalog(categories, last_updated=None):
+    """Build the COMMANDS.yaml structure around grouped commands (dated today by default)."""
     # Generate catalog structure
     catalog = {
         'metadata': {
             'title': 'Commands Catalog',
             'description': 'Auto-generated catalog of all available commands in ClaudeKit Engineer',
-            'last_updated': datetime.now().strftime('%Y-%m-%d'),
-            'total_commands': len(commands)
+            'last_updated': last_updated or datetime.now().strftime('%Y-%m-%d'),
+            'total_commands': sum(len(group) for group in categories.values())
         },
         'categories': {
             'core': 'Core Commands',
@@ -77,32 +441,25 @@ def generate_commands_yaml():
         'commands': categories
     }
 
-    return yaml.dump(catalog, sort_keys=False, allow_unicode=True, default_flow_style=False)
-
+    return catalog
 
-def generate_skills_yaml():
-    """Generate SKILLS.yaml catalog."""
-    skills = load_yaml('skills_data.yaml')
 
-    # Group by category
-    categories = {}
-    for skill in skills:
-        cat = skill['category']
-        if cat not in categories:
-            categories[cat] = []
-        categories[cat].append(skill)
+def generate_skills_yaml(skills=None):
+    """Generate SKILLS.yaml catalog from scanned records, or skills_data.yaml."""
+    if skills is None:
+        skills = load_yaml('skills_data.yaml')
+    return dump_yaml(skills_catalog(group_by_category(skills)))
 
-    # Sort skills within each category
-    for cat in categories:
-        categories[cat] = sorted(categories[cat], key=lambda x: x['name'])
 
+def skills_catalog(categories, last_updated=None):
+    """Build the SKILLS.yaml structure around grouped skills (dated today by default)."""
     # Generate catalog structure
     catalog = {
         'metadata': {
             'title': 'Skills Catalog',
             'description': 'Auto-generated catalog of all available skills in ClaudeKit Engineer',
-            'last_updated': datetime.now().strftime('%Y-%m-%d'),
-            'total_skills': len(skills)
+            'last_updated': last_updated or datetime.now().strftime('%Y-%m-%d'),
+            'total_skills': sum(len(group) for group in categories.values())
         },
         'categories': {
             'ai-ml': 'AI & Machine Learning',
@@ -123,7 +480,7 @@ def generate_skills_yaml():
         'skills': categories
     }
 
-    return yaml.dump(catalog, sort_keys=False, allow_unicode=True, default_flow_style=False)
+    return catalog
 
 
 def write_output(content, output_path=None, label=None):
@@ -137,6 +494,202 @@ def write_output(content, output_path=None, label=None):
         print(content)
 
 
+CATEGORY_KEY_RE = re.compile(r'^  ([^\s\-#\'"][^\n]*):\n', re.MULTILINE)
+
+
+def section_chunks(text, section, categories):
+    """Split the text of a generated catalog's section into per-category chunks.
+
+    Category keys are the only lines of the section indented by exactly two
+    spaces that do not start a list item. The split is only trusted if it
+    yields exactly the given categories in order; otherwise {} is returned.
+    """
+    header = f'\n{section}:\n'
+    start = text.find(header)
+    if start == -1:
+        return {}
+    body = text[start + len(header):]
+    end = re.search(r'^\S', body, re.MULTILINE)
+    if end:
+        body = body[:end.start()]
+
+    heads = list(CATEGORY_KEY_RE.finditer(body))
+    if [m.group(1) for m in heads] != list(categories):
+        return {}
+    bounds = [m.start() for m in heads] + [len(body)]
+    return {m.group(1): body[bounds[i]:bounds[i + 1]] for i, m in enumerate(heads)}
+
+
+def dump_catalog(catalog, section, reuse):
+    """dump_yaml(catalog), taking the text of unchanged categories from reuse.
+
+    Each category of a section dumps to the same text on its own as inside the
+    whole mapping, so only the categories missing from reuse are emitted.
+    """
+    if not reuse or not catalog[section]:
+        return dump_yaml(catalog)
+    parts = []
+    for key, value in catalog.items():
+        if key != section:
+            parts.append(dump_yaml({key: value}))
+            continue
+        parts.append(f'{section}:\n')
+        for cat, group in value.items():
+            chunk = reuse.get(cat)
+            if chunk is None:
+                chunk = dump_yaml({section: {cat: group}})[len(section) + 2:]
+            parts.append(chunk)
+    return ''.join(parts)
+
+
+def update_catalog(output_path, build, entries, section):
+    """Incrementally refresh the catalog file at output_path.
+
+    The previous catalog is read back (through the pickle cache in
+    SCRIPT_DIR, which is primed with every catalog written here, so unchanged
+    runs parse no YAML)
+    and entries are merged into its groups. Nothing is written unless the
+    result differs; then only the categories whose entries changed are dumped
+    again, the rest is copied from the previous file. last_updated only moves
+    when entries change.
+
+    Args:
+        output_path: Catalog file to update (built in full if missing)
+        build: commands_catalog or skills_catalog
+        entries: Current records
+        section: Catalog key holding the grouped entries ('commands' or 'skills')
+    """
+    path = Path(output_path)
+    previous = text = None
+    if path.exists():
+        try:
+            text = path.read_text(encoding='utf-8')
+            previous = read_yaml(path)
+        except (yaml.YAMLError, UnicodeDecodeError):
+            pass  # Unreadable: rebuild from scratch
+    old_groups = previous.get(section) if isinstance(previous, dict) else None
+
+    merged = None
+    if isinstance(old_groups, dict):
+        old_categories = list(old_groups)
+        merged = merge_groups(old_groups, entries)
+    if merged is None:
+        catalog = build(group_by_category(entries))
+        content = dump_yaml(catalog)
+        detail = 'rebuilt'
+    else:
+        groups, changes, touched = merged
+        metadata = previous.get('metadata')
+        last_updated = metadata.get('last_updated') if changes == 0 and isinstance(metadata, dict) else None
+        catalog = build(groups, last_updated)
+        if changes == 0 and catalog == previous:
+            print(f"✓ {output_path} is up to date", file=sys.stderr)
+            return
+        reuse = section_chunks(text, section, old_categories)
+        for cat in touched:
+            reuse.pop(cat, None)
+        content = dump_catalog(catalog, section, reuse)
+        detail = f'{changes} change(s)'
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding='utf-8')
+    if USE_CACHE:
+        write_cache(cache_path(path), path.stat(), hashlib.sha256(content.encode('utf-8')).hexdigest(), catalog)
+    print(f"✓ Updated {output_path} ({detail})", file=sys.stderr)
+
+
+SHARD_INDEX_NAME = 'index.yaml'
+
+
+def shard_filename(category, taken):
+    """File name of a category's shard, unique among the names in taken.
+
+    Unsafe characters are replaced by '-'. Names that would clash with
+    SHARD_INDEX_NAME or an earlier shard (compared case-insensitively, for
+    case-insensitive filesystems) get a numeric suffix. The name is added to
+    taken.
+    """
+    stem = re.sub(r'[^A-Za-z0-9._-]+', '-', str(category)).strip('.') or 'category'
+    filename, n = f'{stem}.yaml', 1
+    while filename.lower() in taken or filename.lower() == SHARD_INDEX_NAME:
+        n += 1
+        filename = f'{stem}-{n}.yaml'
+    taken.add(filename.lower())
+    return filename
+
+
+def write_if_changed(path, content):
+    """Write content to path unless it already holds exactly that; True if written."""
+    try:
+        if path.read_text(encoding='utf-8') == content:
+            return False
+    except (OSError, UnicodeDecodeError):
+        pass
+    path.write_text(content, encoding='utf-8')
+    return True
+
+
+def write_shards(catalog, section, shard_dir):
+    """Write a catalog as one YAML file per category plus a small index.
+
+    index.yaml holds the metadata block, any other top-level sections (such
+    as the skills legend) and, per category, its title, entry count and shard
+    file, so consumers can list categories and load only the shards they
+    need. Each shard holds 'category', 'title' and the category's entries
+    under the section name. Files are only rewritten when their content
+    changes, last_updated is kept while no shard changes, and shards of
+    categories that disappeared are removed (only those the previous index
+    listed, so nothing else in shard_dir is touched).
+
+    Args:
+        catalog: Result of commands_catalog or skills_catalog
+        section: Catalog key holding the grouped entries ('commands' or 'skills')
+        shard_dir: Output directory
+
+    Returns:
+        Number of files written or removed
+    """
+    out = Path(shard_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    index_path = out / SHARD_INDEX_NAME
+    old_index = {}
+    try:
+        old_index = yaml.load(index_path.read_text(encoding='utf-8'), Loader=SafeLoader) or {}
+    except (OSError, UnicodeDecodeError, yaml.YAMLError):
+        pass
+    old_categories = old_index.get('categories') if isinstance(old_index, dict) else None
+    if not isinstance(old_categories, dict):
+        old_categories = {}
+
+    titles = catalog['categories']
+    categories = {}
+    taken = set()
+    written = 0
+    for cat, entries in catalog[section].items():
+        filename = shard_filename(cat, taken)
+        title = titles.get(cat, cat)
+        written += write_if_changed(out / filename, dump_yaml({'category': cat, 'title': title, section: entries}))
+        categories[cat] = {'title': title, 'count': len(entries), 'path': filename}
+
+    metadata = dict(catalog['metadata'])
+    if not written and old_categories == categories and isinstance(old_index.get('metadata'), dict):
+        metadata['last_updated'] = old_index['metadata'].get('last_updated', metadata['last_updated'])
+    index = {'metadata': metadata, 'categories': categories}
+    for key, value in catalog.items():
+        if key not in index and key != section:
+            index[key] = value
+    written += write_if_changed(index_path, dump_yaml(index))
+
+    for shard in old_categories.values():
+        filename = shard.get('path') if isinstance(shard, dict) else None
+        if (isinstance(filename, str) and filename.lower() not in taken
+                and filename.lower() != SHARD_INDEX_NAME and filename == Path(filename).name):
+            if (out / filename).is_file():
+                (out / filename).unlink()
+                written += 1
+    return written
+
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(
         description='Generate command and skill catalogs',
@@ -145,24 +698,83 @@ if __name__ == '__main__':
     parser.add_argument('--skills', action='store_true', help='Generate only skills catalog')
     parser.add_argument('--commands', action='store_true', help='Generate only commands catalog')
     parser.add_argument('--output', '-o', metavar='PATH', help='Write output to file instead of stdout')
+    parser.add_argument('--scan', metavar='ROOT',
+                        help='Scan ROOT/.claude/commands and ROOT/.claude/skills directly '
+                             'instead of reading commands_data.yaml / skills_data.yaml')
+    parser.add_argument('--jobs', '-j', type=int, default=0, metavar='N',
+                        help='Worker processes for --scan (0 = all CPUs, default: 0)')
+    parser.add_argument('--shard-dir', metavar='DIR',
+                        help=f'Write one file per category plus {SHARD_INDEX_NAME} to DIR '
+                             'instead of a single catalog')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Merge changed entries into the existing --output catalog and '
+                             'rewrite it only if something changed')
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f'Parse the data files instead of using the cache in {CACHE_DIR}/')
+    parser.add_argument('--profile', nargs='?', const='', metavar='PREFIX',
+                        help=f'Write PREFIX.pstats and PREFIX.collapsed.txt (default prefix: {DEFAULT_PROFILE_PREFIX})')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='With --profile, also record tracemalloc peak memory per catalog')
     args = parser.parse_args()
+    USE_CACHE = not args.no_cache
 
     # Validate: --output requires exactly one of --skills or --commands
     if args.output and not (args.skills ^ args.commands):
         print("Error: --output requires exactly one of --skills or --commands", file=sys.stderr)
         sys.exit(1)
+    if args.shard_dir and (args.output or not (args.skills ^ args.commands)):
+        print("Error: --shard-dir requires exactly one of --skills or --commands, and no --output", file=sys.stderr)
+        sys.exit(1)
+    if args.incremental and not args.output:
+        print("Error: --incremental requires --output", file=sys.stderr)
+        sys.exit(1)
+    if args.profile_memory and args.profile is None:
+        print("Error: --profile-memory requires --profile", file=sys.stderr)
+        sys.exit(1)
+    if args.scan and not claude_dir(args.scan).is_dir():
+        print(f"Error: {args.scan} has no .claude directory to scan", file=sys.stderr)
+        sys.exit(1)
 
     # If no specific flag, generate both (to stdout only)
     generate_both = not (args.skills or args.commands)
+    memory = None
 
-    if args.commands or generate_both:
-        commands_yaml = generate_commands_yaml()
-        if generate_both:
-            print("# === COMMANDS CATALOG ===")
-        write_output(commands_yaml, args.output if args.commands else None)
-
-    if args.skills or generate_both:
-        skills_yaml = generate_skills_yaml()
-        if generate_both:
-            print("\n# === SKILLS CATALOG ===")
-        write_output(skills_yaml, args.output if args.skills else None)
+    def run():
+        if args.commands or generate_both:
+            if memory:
+                memory.begin('commands')
+            commands = scan_commands(args.scan, args.jobs) if args.scan else load_yaml('commands_data.yaml')
+            if args.incremental:
+                update_catalog(args.output, commands_catalog, commands, 'commands')
+                return
+            if args.shard_dir:
+                written = write_shards(commands_catalog(group_by_category(commands)), 'commands', args.shard_dir)
+                print(f"✓ Wrote {args.shard_dir} ({written} file(s) changed)", file=sys.stderr)
+                return
+            commands_yaml = generate_commands_yaml(commands)
+            if generate_both:
+                print("# === COMMANDS CATALOG ===")
+            write_output(commands_yaml, args.output if args.commands else None)
+
+        if args.skills or generate_both:
+            if memory:
+                memory.begin('skills')
+            skills = scan_skills(args.scan, args.jobs) if args.scan else load_yaml('skills_data.yaml')
+            if args.incremental:
+                update_catalog(args.output, skills_catalog, skills, 'skills')
+                return
+            if args.shard_dir:
+                written = write_shards(skills_catalog(group_by_category(skills)), 'skills', args.shard_dir)
+                print(f"✓ Wrote {args.shard_dir} ({written} file(s) changed)", file=sys.stderr)
+                return
+            skills_yaml = generate_skills_yaml(skills)
+            if generate_both:
+                print("\n# === SKILLS CATALOG ===")
+            write_output(skills_yaml, args.output if args.skills else None)
+
+    if args.profile is None:
+        run()
+    else:
+        from profile_utils import MemoryPhases, run_profiled
+        memory = MemoryPhases() if args.profile_memory else None
+        run_profiled(run, args.profile or DEFAULT_PROFILE_PREFIX, memory)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Profiling utilities for ClaudeKit scripts.
+
+Runs an entry point under cProfile and a low-overhead stack sampler, writing:
+
+    PREFIX.pstats           cProfile data (python -m pstats, snakeviz, ...)
+    PREFIX.collapsed.txt    collapsed stacks ("a;b;c count") for flamegraph.pl,
+                            speedscope or inferno
+    PREFIX.memory.txt       peak traced memory per phase (with memory=True)
+
+Usage:
+    from profile_utils import MemoryPhases, run_profiled
+
+    memory = MemoryPhases()
+    exit_code = run_profiled(main, "profile/generate", memory=memory)
+    # Inside main, call memory.begin("phase-name") at each phase boundary
+"""
+
+import cProfile
+import pstats
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_SAMPLE_INTERVAL = 0.001  # seconds between stack samples
+TOP_FUNCTIONS = 15
+
+
+class StackSampler:
+    """Sample one thread's Python stack at a fixed interval.
+
+    Each sample is stored as a collapsed stack (root first, frames joined by
+    ';'), which is the input format of flame graph tools.
+    """
+
+    def __init__(self, thread_id: int, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{Path(code.co_filename).name}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def write_collapsed(self, path: Path) -> None:
+        lines = [f"{stack} {count}" for stack, count in sorted(self.samples.items())]
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+class MemoryPhases:
+    """Peak traced memory per named phase, measured with tracemalloc."""
+
+    def __init__(self):
+        self.peaks: dict[str, int] = {}
+        self.current: Optional[str] = None
+
+    def begin(self, name: str) -> None:
+        """Close the running phase and start measuring a new one."""
+        self.end()
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            self.current = name
+
+    def end(self) -> None:
+        if self.current is not None and tracemalloc.is_tracing():
+            peak = tracemalloc.get_traced_memory()[1]
+            self.peaks[self.current] = max(self.peaks.get(self.current, 0), peak)
+        self.current = None
+
+    def report(self) -> str:
+        lines = [f"{'phase':<16} {'peak MiB':>10}"]
+        for name, peak in self.peaks.items():
+            lines.append(f"{name:<16} {peak / 1048576:>10.2f}")
+        return "\n".join(lines) + "\n"
+
+
+def run_profiled(
+    func,
+    prefix: str,
+    memory: Optional[MemoryPhases] = None,
+    interval: float = DEFAULT_SAMPLE_INTERVAL,
+):
+    """Run func() under cProfile and the stack sampler, then write reports.
+
+    Only the calling process is profiled; work handed to worker processes
+    shows up as time spent waiting on the pool.
+
+    Args:
+        func: Zero-argument entry point
+        prefix: Output path prefix (directories are created as needed)
+        memory: Phase tracker to fill using tracemalloc, or None to skip
+        interval: Stack sampling interval in seconds
+
+    Returns:
+        Whatever func returns
+    """
+    out = Path(prefix)
+    out.parent.mkdir(parents=True, exist_ok=True)
+
+    if memory is not None:
+        tracemalloc.start()
+        memory.begin("startup")
+    sampler = StackSampler(threading.get_ident(), interval)
+    profiler = cProfile.Profile()
+
+    sampler.start()
+    profiler.enable()
+    try:
+        return func()
+    finally:
+        profiler.disable()
+        sampler.stop()
+
+        pstats_path = out.with_name(out.name + ".pstats")
+        collapsed_path = out.with_name(out.name + ".collapsed.txt")
+        profiler.dump_stats(pstats_path)
+        sampler.write_collapsed(collapsed_path)
+        print(f"\nProfile written to {pstats_path} and {collapsed_path}", file=sys.stderr)
+
+        if memory is not None:
+            memory.end()
+            tracemalloc.stop()
+            memory_path = out.with_name(out.name + ".memory.txt")
+            memory_path.write_text(memory.report(), encoding="utf-8")
+            print(f"Peak memory per phase written to {memory_path}", file=sys.stderr)
+            print(memory.report(), file=sys.stderr)
+
+        stats = pstats.Stats(profiler, stream=sys.stderr)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_FUNCTIONS)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# Test script for the generate-opencode.py manifest journal
+#
+# Run from the repository root: python tests/test-generate-opencode.py
+
+import importlib.util
+import sys
+import tempfile
+from pathlib import Path
+
+GENERATOR_PATH = Path(__file__).resolve().parent.parent / "scripts" / "generate-opencode.py"
+
+
+def load_generator():
+    """Import generate-opencode.py as a module (its name is not importable)."""
+    spec = importlib.util.spec_from_file_location("generate_opencode", GENERATOR_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def check(passed, message):
+    print(f"✓ PASS: {message}" if passed else f"✗ FAIL: {message}")
+    return passed
+
+
+def main():
+    gen = load_generator()
+    print("=== Testing generate-opencode manifest journal ===")
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        opencode = root / ".opencode"
+        source = root / "source.md"
+        source.write_text("source\n", encoding="utf-8")
+        done, partial, other = (opencode / name for name in ("done.md", "skill-0", "AGENTS.md"))
+
+        def interrupted_run(steps):
+            manifest = gen.Manifest.load(opencode, root)
+            for output, finish in steps:
+                manifest.begin(output)
+                if finish:
+                    manifest.record(output, [source])
+            manifest.journal.close()  # Killed: no save()
+
+        # The first run finishes one output and leaves another half-written;
+        # the resumed run is interrupted before it reaches the unfinished one
+        interrupted_run([(done, True), (partial, False)])
+        interrupted_run([(other, False)])
+        manifest = gen.Manifest.load(opencode, root)
+
+        print("")
+        print("Test 1: Unfinished outputs are not recorded as done")
+        ok &= check(
+            ".opencode/skill-0" not in manifest.entries and ".opencode/AGENTS.md" not in manifest.entries,
+            "No manifest entry for unfinished outputs",
+        )
+
+        print("")
+        print("Test 2: Unfinished outputs survive a second interruption")
+        for key in (".opencode/skill-0", ".opencode/AGENTS.md"):
+            ok &= check(key in manifest.in_flight, f"{key} still in flight")
+
+        print("")
+        print("Test 3: Finished outputs are carried over by the resumed run")
+        ok &= check(".opencode/done.md" in manifest.resumed, ".opencode/done.md resumed")
+
+    print("")
+    print("=== Test complete ===")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())